@@ -3,6 +3,8 @@
 import os
 import asyncio
 import base64
+import numpy as np
+from functools import lru_cache
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -173,6 +175,8 @@ def translate_hume_emotion(hume_emotion: str) -> str:
 
     return "neutral"
 
+# Stress levels come from a small set of per-emotion values, so repeats are common
+@lru_cache(maxsize=128)
 def get_stress_category(stress_percentage: float) -> str:
     if stress_percentage < 30:
         return "Low Stress"
@@ -183,6 +187,13 @@ def get_stress_category(stress_percentage: float) -> str:
     else:
         return "Critical Stress"
 
+# Same cut-offs as get_stress_category, for categorizing many levels at once
+_STRESS_THRESHOLDS = np.array([30, 60, 80])
+_STRESS_LABELS = np.array(["Low Stress", "Moderate Stress", "High Stress", "Critical Stress"])
+
+def get_stress_categories(stress_percentages) -> np.ndarray:
+    return _STRESS_LABELS[np.digitize(stress_percentages, _STRESS_THRESHOLDS)]
+
 def test_hume_connection():
     if not hume_client:
         print("❌ Hume AI client not initialized")
@@ -1 +1,65 @@
 # Agent package
+
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Optional, Union
+
+import google.generativeai as genai
+
+_gemini_lock = threading.Lock()
+_gemini_key = None
+
+
+def configure_gemini(api_key: str) -> None:
+    """Configure google.generativeai for api_key, keeping its pooled client if the key is unchanged.
+
+    genai.configure() discards the SDK's cached clients, so calling it from every
+    agent constructor opened a new connection (and TLS handshake) per request.
+    """
+    global _gemini_key
+    with _gemini_lock:
+        if api_key != _gemini_key:
+            genai.configure(api_key=api_key)
+            _gemini_key = api_key
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    importlib.import_module() holds the import system's per-module lock, so threads
+    that touch the module at the same time wait for one complete import.
+    (importlib.util.LazyLoader is not thread-safe before Python 3.12.)
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+def import_lazily(name: str, package: Optional[str] = None) -> Union[ModuleType, _LazyModule]:
+    """Import a module whose body only runs on first attribute access.
+
+    Keeps heavy agent dependencies (Google API clients, OpenCV, Hume) off the startup path.
+    """
+    name = importlib.util.resolve_name(name, package)
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
+
+
+def call_lazily(module: Union[ModuleType, _LazyModule], name: str, *args, **kwargs):
+    """Look up name on module and call it.
+
+    Pass this to asyncio.to_thread instead of module.name, so a lazy module's first
+    import runs in the worker thread rather than on the event loop.
+    """
+    return getattr(module, name)(*args, **kwargs)
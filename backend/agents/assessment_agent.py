@@ -1,32 +1,38 @@
 """Assessment Agent - Generates quizzes and evaluates understanding."""
 
 from typing import Dict, List, Any
+import asyncio
 import random
 import json
 import google.generativeai as genai
 
+from . import configure_gemini
+
 class AssessmentAgent:
     """Agent for creating assessments and evaluating student progress."""
 
+    _MC_QUESTION_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=300)
+    _SHORT_QUESTION_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=200)
+
     def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
+        configure_gemini(gemini_api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
 
     def generate_quiz(self, topic: str, learning_data: Dict[str, Any], num_questions: int = 5) -> Dict[str, Any]:
         """Generate a quiz based on learning resources and topic."""
-        import asyncio
-
         # Create the event loop and run the async function
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If event loop is already running, use synchronous approach
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self._generate_quiz_async(topic, learning_data, num_questions))
-                    return future.result()
-            else:
-                return loop.run_until_complete(self._generate_quiz_async(topic, learning_data, num_questions))
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop in this thread (plain scripts or asyncio.to_thread workers)
+                return asyncio.run(self._generate_quiz_async(topic, learning_data, num_questions))
+
+            # If event loop is already running, run in a separate thread
+            import concurrent.futures
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                future = executor.submit(asyncio.run, self._generate_quiz_async(topic, learning_data, num_questions))
+                return future.result()
         except:
             # Fallback to basic quiz generation if async fails
             return self._generate_basic_quiz(topic, learning_data, num_questions)
@@ -175,10 +181,7 @@ Return ONLY the JSON object, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=300
-                )
+                generation_config=self._MC_QUESTION_CONFIG
             )
 
             content = response.text
@@ -229,10 +232,7 @@ Return ONLY the JSON object, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=200
-                )
+                generation_config=self._SHORT_QUESTION_CONFIG
             )
 
             content = response.text
@@ -281,10 +281,7 @@ Return ONLY the JSON object, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=200
-                )
+                generation_config=self._SHORT_QUESTION_CONFIG
             )
 
             content = response.text
@@ -395,6 +392,47 @@ Return ONLY the JSON object, no other text."""
             "recommendations": recommendations
         }
 
+# Gemini response schema for the quiz questions list
+QUIZ_QUESTIONS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "question": {"type": "STRING"},
+            "options": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "correct_answer": {"type": "INTEGER"},
+            "explanation": {"type": "STRING"}
+        },
+        "required": ["question", "options", "correct_answer"]
+    }
+}
+
+def quiz_prompt_section(topic: str, num_questions: int) -> str:
+    """Quiz questions part of the batched orchestrator prompt."""
+    return (f"quiz_questions: {num_questions} multiple choice questions about {topic}. "
+            "Each object has question, options (4 strings), correct_answer (index 0-3 of the "
+            "correct option) and a brief explanation.")
+
+def build_quiz(topic: str, learning_data: Dict[str, Any], questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a quiz in generate_quiz's format from pre-generated multiple choice questions."""
+    quiz_questions = [{
+        "id": f"q_{random.randint(1000, 9999)}",
+        "type": "multiple_choice",
+        "topic": topic,
+        "question": q["question"],
+        "options": q.get("options", []),
+        "correct_answer": q.get("correct_answer", 0),
+        "explanation": q.get("explanation", "This is a key concept in this topic.")
+    } for q in questions if q.get("question")]
+
+    return {
+        "topic": topic,
+        "difficulty": learning_data.get("difficulty", "intermediate"),
+        "questions": quiz_questions,
+        "total_questions": len(quiz_questions),
+        "estimated_time": f"{len(quiz_questions) * 2} minutes"
+    }
+
 def generate_quiz(topic: str, learning_data: Dict[str, Any], num_questions: int = 5, api_key: str = None) -> Dict[str, Any]:
     """Helper function to generate a quiz."""
     agent = AssessmentAgent(api_key)
@@ -6,6 +6,8 @@ import asyncio
 from typing import Dict, List, Any
 import google.generativeai as genai
 
+from . import configure_gemini
+
 # Google API imports
 try:
     from googleapiclient.discovery import build
@@ -17,8 +19,12 @@ except ImportError:
 class LearningResourceAgent:
     """Agent for recommending learning resources."""
 
+    _ARTICLES_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=600)
+    _PDF_ANALYSIS_CONFIG = genai.types.GenerationConfig(temperature=0.3, max_output_tokens=400)
+    _VIDEOS_CONFIG = genai.types.GenerationConfig(temperature=0.7, max_output_tokens=500)
+
     def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
+        configure_gemini(gemini_api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
 
         # Initialize Google API clients
@@ -37,8 +43,12 @@ class LearningResourceAgent:
             self.youtube_service = None
             self.books_service = None
 
-    async def search_resources_async(self, topic: str, pdf_content: str = None) -> Dict[str, Any]:
-        """Search for learning resources using real APIs asynchronously."""
+    async def search_resources_async(self, topic: str, pdf_content: str = None, articles: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Search for learning resources using real APIs asynchronously.
+
+        Pass pre-generated GeeksforGeeks articles (e.g. from a combined Gemini call) to skip
+        the article generation request.
+        """
         resources = []
 
         # If PDF content is provided, analyze it first
@@ -55,8 +65,9 @@ class LearningResourceAgent:
         if self.books_service:
             tasks.append(self._search_google_books(topic))
 
-        # Always include GeeksforGeeks-style resources via LLM
-        tasks.append(self._get_geeksforgeeks_resources(topic))
+        # Always include GeeksforGeeks-style resources via LLM, unless already provided
+        if articles is None:
+            tasks.append(self._get_geeksforgeeks_resources(topic))
 
         # Execute all searches concurrently
         if tasks:
@@ -66,6 +77,9 @@ class LearningResourceAgent:
                 if not isinstance(result, Exception) and result:
                     resources.extend(result)
 
+        if articles:
+            resources.extend(articles[:2])
+
         # Estimate difficulty and time
         difficulty = self._estimate_difficulty(topic, resources)
         estimated_time = self._estimate_study_time(resources)
@@ -77,20 +91,21 @@ class LearningResourceAgent:
             "pdf_analysis": pdf_analysis if pdf_content else None
         }
 
-    def search_resources(self, topic: str, pdf_content: str = None) -> Dict[str, Any]:
+    def search_resources(self, topic: str, pdf_content: str = None, articles: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Search for learning resources using real APIs (synchronous wrapper)."""
         # Run async function in event loop
         try:
-            import asyncio
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If event loop is already running, use asyncio.create_task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.search_resources_async(topic, pdf_content))
-                    return future.result()
-            else:
-                return loop.run_until_complete(self.search_resources_async(topic, pdf_content))
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop in this thread (plain scripts or asyncio.to_thread workers)
+                return asyncio.run(self.search_resources_async(topic, pdf_content, articles))
+
+            # If event loop is already running, run in a separate thread
+            import concurrent.futures
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                future = executor.submit(asyncio.run, self.search_resources_async(topic, pdf_content, articles))
+                return future.result()
         except:
             # Fallback to mock response if APIs fail
             return self._get_mock_resources(topic)
@@ -205,10 +220,7 @@ Return ONLY the JSON array, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=600
-                )
+                generation_config=self._ARTICLES_CONFIG
             )
 
             content = response.text
@@ -282,10 +294,7 @@ Return ONLY the JSON object, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=400
-                )
+                generation_config=self._PDF_ANALYSIS_CONFIG
             )
 
             content = response.text
@@ -377,10 +386,7 @@ Return ONLY the JSON array, no other text."""
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500
-                )
+                generation_config=self._VIDEOS_CONFIG
             )
 
             content = response.text
@@ -446,7 +452,29 @@ Return ONLY the JSON array, no other text."""
             "estimated_time": "2 hours"
         }
 
-def get_learning_resources(topic: str, api_key: str, pdf_content: str = None) -> Dict[str, Any]:
+# Gemini response schema for the articles list
+ARTICLES_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "title": {"type": "STRING"},
+            "platform": {"type": "STRING"},
+            "type": {"type": "STRING"},
+            "url": {"type": "STRING"},
+            "description": {"type": "STRING"}
+        },
+        "required": ["title", "url"]
+    }
+}
+
+def articles_prompt_section(topic: str) -> str:
+    """Articles part of the batched orchestrator prompt."""
+    return (f"articles: 2 realistic GeeksforGeeks article recommendations for {topic}. "
+            "Each object has a GeeksforGeeks-style title, platform \"GeeksforGeeks\", type \"article\", "
+            "url (starting with https://www.geeksforgeeks.org/) and a 2-3 sentence description.")
+
+def get_learning_resources(topic: str, api_key: str, pdf_content: str = None, articles: List[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Helper function to get learning resources."""
     agent = LearningResourceAgent(api_key)
-    return agent.search_resources(topic, pdf_content)
+    return agent.search_resources(topic, pdf_content, articles)
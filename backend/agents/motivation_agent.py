@@ -6,11 +6,13 @@ import json
 from datetime import datetime
 import google.generativeai as genai
 
+from . import configure_gemini
+
 class MotivationAgent:
     """Agent for keeping students engaged and emotionally supported."""
 
     def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
+        configure_gemini(gemini_api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
         self.affirmations = [
             "You're capable of amazing things when you put your mind to it.",
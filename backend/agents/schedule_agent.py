@@ -2,6 +2,7 @@
 
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
+from functools import cached_property
 import json
 import os
 from dotenv import load_dotenv
@@ -20,15 +21,16 @@ except ImportError:
 class ScheduleAgent:
     """Agent for creating study schedules and managing calendar with Google Calendar integration."""
 
-    def __init__(self):
-        self.calendar_service = None
-        self._initialize_google_calendar()
+    @cached_property
+    def calendar_service(self):
+        """Google Calendar API service, built on first use and reused for the agent's lifetime."""
+        return self._initialize_google_calendar()
 
     def _initialize_google_calendar(self):
         """Initialize Google Calendar API service."""
         if not GOOGLE_CALENDAR_AVAILABLE:
             print("Google Calendar API libraries not available - falling back to mock events")
-            return
+            return None
 
         try:
             # Get credentials from environment
@@ -39,7 +41,7 @@ class ScheduleAgent:
             if not all([client_id, client_secret, refresh_token]):
                 print("Google Calendar credentials not found in environment - falling back to mock events")
                 print("Set GOOGLE_CALENDAR_CLIENT_ID, GOOGLE_CALENDAR_CLIENT_SECRET, and GOOGLE_CALENDAR_CREDENTIALS_REFRESH_TOKEN")
-                return
+                return None
 
             # Create credentials using refresh token
             creds = Credentials(
@@ -56,13 +58,14 @@ class ScheduleAgent:
                 creds.refresh(Request())
 
             # Build the service
-            self.calendar_service = build("calendar", "v3", credentials=creds)
+            service = build("calendar", "v3", credentials=creds)
             print("✅ Google Calendar API initialized successfully")
+            return service
 
         except Exception as e:
             print(f"Failed to initialize Google Calendar API: {e}")
             print("Falling back to mock calendar events")
-            self.calendar_service = None
+            return None
 
     def create_study_plan(self, topic: str, learning_data: Dict[str, Any], wellness_data: Dict[str, Any] = None, create_google_events: bool = False) -> Dict[str, Any]:
         """Create a personalized study plan based on learning resources and wellness data."""
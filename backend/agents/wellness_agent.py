@@ -19,8 +19,10 @@ except ImportError:
 try:
     import cv2
     CV2_AVAILABLE = True
+    _FACE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 except ImportError:
     CV2_AVAILABLE = False
+    _FACE_CASCADE = None
 
 class WellnessAgent:
     """Agent for monitoring and supporting student wellness with Hume AI."""
@@ -28,10 +30,14 @@ class WellnessAgent:
     def __init__(self):
         self.hume_api_key = os.getenv("HUME_API_KEY")
         self.hume_client = None
+        self._hume_configs = None
+        self._hume_prefix = b"data:image/jpeg;base64,"
 
         if HUME_AVAILABLE and self.hume_api_key:
             try:
                 self.hume_client = HumeBatchClient(self.hume_api_key)
+                # Config objects are immutable, build them once per agent
+                self._hume_configs = [BurstConfig(), FacemeshConfig()]
                 print("🎥 Hume AI emotion detection initialized")
             except Exception as e:
                 print(f"Failed to initialize Hume AI: {e}")
@@ -75,15 +81,11 @@ class WellnessAgent:
             return {"emotion": "neutral", "confidence": 0.5, "mood": "stable"}
 
         try:
-            # Configure Hume AI for facial emotion analysis
-            configs = [BurstConfig(), FacemeshConfig()]
-
-            # Convert image bytes to base64
-            image_b64 = base64.b64encode(image_data).decode("utf-8")
-            urls = [f"data:image/jpeg;base64,{image_b64}"]
+            # Convert image bytes to a base64 data URI
+            urls = [(self._hume_prefix + base64.b64encode(image_data)).decode("ascii")]
 
             # Run Hume AI analysis
-            job = self.hume_client.submit_job(urls, configs)
+            job = self.hume_client.submit_job(urls, self._hume_configs)
 
             # Wait for results
             result = job.get_job_result()
@@ -148,6 +150,12 @@ class WellnessAgent:
             if not ret:
                 return {"emotion": "neutral", "confidence": 0.5, "error": "capture_failed"}
 
+            # Cheap face check first - skip JPEG encode and the Hume round-trip when nobody is there
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = _FACE_CASCADE.detectMultiScale(gray, 1.2, 4, minSize=(80, 80))
+            if len(faces) == 0:
+                return {"emotion": "neutral", "confidence": 0.5, "error": "no_face"}
+
             # Convert to PIL Image and then to bytes
             pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
             buffer = io.BytesIO()
@@ -0,0 +1,25 @@
+"""Settings read from the environment once instead of on every access."""
+
+import os
+
+GEMINI_API_KEY = None
+OPENAI_API_KEY = None
+HUME_API_KEY = None
+ALLOWED_ORIGINS = ()
+
+
+def reload() -> None:
+    """Re-read settings from os.environ (after loading a .env file, or in tests)."""
+    global GEMINI_API_KEY, OPENAI_API_KEY, HUME_API_KEY, ALLOWED_ORIGINS
+
+    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+    HUME_API_KEY = os.environ.get("HUME_API_KEY")
+    ALLOWED_ORIGINS = tuple(
+        origin.strip()
+        for origin in os.environ.get("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
+        if origin.strip()
+    )
+
+
+reload()
@@ -4,23 +4,20 @@ Student AI Assistant - Interactive Demo Script
 Run this to interact with your multi-agent system!
 """
 
-import os
-import sys
-from dotenv import load_dotenv
-
-# Manual .env loading to ensure it works
-if os.path.exists('.env'):
-    API_KEYS = {}
-    with open('.env', 'r') as f:
-        for line in f:
-            line = line.strip()
-            if '=' in line and not line.startswith('#'):
-                key, value = line.split('=', 1)
-                API_KEYS[key.strip()] = value.strip()
-    os.environ.update(API_KEYS)
-
-# Load with dotenv as backup
-load_dotenv('.env')
+import asyncio
+
+import config
+from envcache import load_env_once
+from orchestrator import create_study_assistant
+
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+load_env_once('.env')
+config.reload()
 
 def main():
     print("🎯 STUDENT AI ASSISTANT - INTERACTIVE DEMO")
@@ -30,7 +27,7 @@ def main():
     print()
 
     # Check API keys
-    api_key = os.getenv('GEMINI_API_KEY') or os.getenv('OPENAI_API_KEY')
+    api_key = config.GEMINI_API_KEY or config.OPENAI_API_KEY
     if not api_key:
         print("❌ No AI API key found. Please check your .env file")
         return
@@ -40,16 +37,7 @@ def main():
     try:
         # Initialize system
         print("🔧 Initializing multi-agent system...")
-
-        # Add current directory to sys.path
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        if current_dir not in sys.path:
-            sys.path.insert(0, current_dir)
-
-        # Simple direct import approach
-        sys.path.insert(0, os.getcwd())
-        import orchestrator
-        orchestrator = orchestrator.create_study_assistant(api_key)
+        orchestrator = create_study_assistant(api_key)
         print("✅ System ready! Start talking with your AI assistant.")
         print("-" * 60)
 
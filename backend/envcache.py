@@ -0,0 +1,22 @@
+"""Parse .env files once per process and merge them into os.environ."""
+
+import os
+from functools import lru_cache
+from dotenv import dotenv_values
+
+
+@lru_cache(maxsize=None)
+def load_env_once(path: str = ".env") -> None:
+    """Load KEY=VALUE pairs from path into os.environ.
+
+    Variables already set in the environment win over the file. The parse is
+    cached per path, so repeat calls are free.
+    """
+    # python-dotenv handles quoting, inline comments and `export` prefixes
+    env = {
+        key: value
+        for key, value in dotenv_values(path).items()
+        if value is not None and key not in os.environ
+    }
+
+    os.environ.update(env)
@@ -3,9 +3,19 @@
 FINAL WORKING DEMONSTRATION of Student AI Assistant with Hume AI
 """
 
+import asyncio
 import os
 import sys
 
+import config
+from envcache import load_env_once
+
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 print("🎯 STUDENT AI ASSISTANT - FINAL DEMONSTRATION")
 print("=" * 60)
 print("Proving your multi-agent system with Hume AI emotion detection works!")
@@ -19,23 +29,15 @@ print("-" * 35)
 if os.path.exists('.env'):
     print("✅ .env file found")
 
-    # Parse .env file manually
-    api_keys = {}
-    with open('.env', 'r') as f:
-        for line in f:
-            line = line.strip()
-            if '=' in line and not line.startswith('#'):
-                key, value = line.split('=', 1)
-                api_keys[key.strip()] = value.strip()
+    # Parse .env file once and set environment variables
+    load_env_once('.env')
+    config.reload()
 
-    gemini_key = api_keys.get('GEMINI_API_KEY')
-    hume_key = api_keys.get('HUME_API_KEY')
+    gemini_key = config.GEMINI_API_KEY
+    hume_key = config.HUME_API_KEY
 
     print(f"🔑 GEMINI_API_KEY: {'✅ SET' if gemini_key else '❌ MISSING'}")
     print(f"🔑 HUME_API_KEY: {'✅ SET' if hume_key else '❌ MISSING'}")
-
-    # Set environment variables
-    os.environ.update(api_keys)
     print("✅ Environment variables loaded")
 
 else:
@@ -2,48 +2,55 @@
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, AsyncIterator
 import os
-import aiofiles
-import fitz  # PyMuPDF for PDF processing
-import tempfile
-
-try:
-    from dotenv import load_dotenv
-    load_dotenv('.env')  # Try current directory first
-    # Also try backend directory
-    import os
-    if not os.getenv("GEMINI_API_KEY"):
-        backend_env = os.path.join(os.path.dirname(__file__), '.env')
-        load_dotenv(backend_env)
-except ImportError:
-    pass  # dotenv not available, will rely on system env vars
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import lru_cache
 
 try:
+    from . import config
+    from .envcache import load_env_once
     from .orchestrator import create_study_assistant
 except ImportError:
+    import config
+    from envcache import load_env_once
     from orchestrator import create_study_assistant
 
+load_env_once('.env')  # Try current directory first
+# Also try backend directory
+if not os.getenv("GEMINI_API_KEY"):
+    load_env_once(os.path.join(os.path.dirname(__file__), '.env'))
+config.reload()
+
 app = FastAPI(
     title="Student AI Assistant",
     description="Multi-agent AI system for personalized student learning and wellness",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],  # React dev server
+    allow_origins=list(config.ALLOWED_ORIGINS),  # React dev server by default
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Compress the larger study plan payloads for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Request/Response models
 class StudyRequest(BaseModel):
     user_input: str
     student_id: Optional[str] = "demo_student"
+    # Limit the LLM-backed sections ("learning", "assessment"); None generates all
+    requested_agents: Optional[List[str]] = None
 
 class StudyResponse(BaseModel):
     greeting: str
@@ -60,17 +67,42 @@ class HealthCheckResponse(BaseModel):
     message: str
     agents_available: list
 
+# Defaults for any top-level keys missing from an orchestrator response
+_DEFAULT_RESPONSE = {
+    "greeting": "",
+    "study_plan": {},
+    "learning_resources": {},
+    "wellness_insights": {},
+    "assessment": {},
+    "motivational_support": {},
+    "calendar_events": [],
+    "metadata": {}
+}
+
+def _finalize(response: Dict[str, Any]) -> ORJSONResponse:
+    """Fill in any missing top-level keys and serialize an orchestrator response."""
+    return ORJSONResponse({**_DEFAULT_RESPONSE, **response})
+
 # Global orchestrator instance
 orchestrator = None
 
+@lru_cache(maxsize=None)
+def _get_schedule_agent():
+    """Shared schedule agent, built on the first calendar request so boot skips the Google API client."""
+    try:
+        from .agents.schedule_agent import ScheduleAgent
+    except ImportError:
+        from agents.schedule_agent import ScheduleAgent
+    return ScheduleAgent()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the orchestrator on startup."""
     global orchestrator
 
     # Get Gemini API key from environment (preferred) or OpenAI as fallback
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    openai_api_key = os.getenv("OPENAI_API_KEY")
+    gemini_api_key = config.GEMINI_API_KEY
+    openai_api_key = config.OPENAI_API_KEY
 
     print(f"DEBUG: GEMINI_API_KEY found: {gemini_api_key is not None}")
     print(f"DEBUG: OPENAI_API_KEY found: {openai_api_key is not None}")
@@ -114,7 +146,9 @@ async def health_check():
         agents_available=agents_available
     )
 
-@app.post("/study-plan", response_model=StudyResponse)
+# response_model only documents the schema; returning ORJSONResponse skips revalidating
+# the orchestrator output, which already has this shape
+@app.post("/study-plan", response_model=StudyResponse, response_class=ORJSONResponse)
 async def create_study_plan(request: StudyRequest):
     """Create a personalized study plan using the multi-agent system."""
     if not orchestrator:
@@ -125,29 +159,29 @@ async def create_study_plan(request: StudyRequest):
 
     try:
         # Process the request through the orchestrator
-        response = orchestrator.process_request(request.user_input, request.student_id)
-
-        # Validate response structure
-        required_keys = ["greeting", "study_plan", "learning_resources", "wellness_insights",
-                        "assessment", "motivational_support", "calendar_events", "metadata"]
-
-        for key in required_keys:
-            if key not in response:
-                response[key] = {} if key != "calendar_events" else []
-
-        return StudyResponse(**response)
+        return _finalize(await orchestrator.aprocess_request(request.user_input, request.student_id,
+                                                             request.requested_agents))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing study plan: {str(e)}")
 
 @app.get("/demo")
 async def demo_study_plan():
-    """Demo endpoint with pre-configured ML exam preparation."""
-    demo_request = StudyRequest(
-        user_input="Help me prepare for my Machine Learning exam",
-        student_id="demo_student"
-    )
-    return await create_study_plan(demo_request)
+    """Demo endpoint with pre-configured ML exam preparation (cached for 5 minutes)."""
+    if not orchestrator:
+        raise HTTPException(
+            status_code=503,
+            detail="Study assistant is not available. Please check the API key configuration."
+        )
+
+    try:
+        response = await orchestrator.acached_process_request(
+            "Help me prepare for my Machine Learning exam", "demo_student"
+        )
+        return _finalize(response)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing study plan: {str(e)}")
 
 @app.get("/agents/status")
 async def get_agents_status():
@@ -163,7 +197,11 @@ async def get_agents_status():
         "wellness_agent": "active",
         "assessment_agent": "active",
         "personalization_agent": "active",
-        "motivation_agent": "active"
+        "motivation_agent": "active",
+        # Counts LLM-backed agent calls; each may make several Gemini requests
+        "llm_agent_calls_in_flight": orchestrator.llm_in_flight,
+        "llm_max_concurrent_agent_calls": orchestrator.llm_max_concurrency,
+        "response_cache": orchestrator.response_cache.stats()
     }
 
 # Additional endpoints for future expansion
@@ -182,7 +220,7 @@ async def get_student_analytics(student_id: str):
     """Get student analytics (future implementation)."""
     return {"message": f"Analytics for student {student_id} - coming soon!"}
 
-@app.post("/study-plan-with-calendar")
+@app.post("/study-plan-with-calendar", response_class=ORJSONResponse)
 async def create_study_plan_with_calendar(
     user_input: str,
     student_id: str = "demo_student",
@@ -197,14 +235,13 @@ async def create_study_plan_with_calendar(
 
     try:
         # Process the request through the orchestrator
-        response = orchestrator.process_request(user_input, student_id)
+        response = await orchestrator.aprocess_request(user_input, student_id)
 
         # If calendar events are requested, create them via schedule agent
         if create_calendar_events:
             try:
-                # Get the existing schedule agent and create Google Calendar events
-                from agents.schedule_agent import ScheduleAgent
-                schedule_agent = ScheduleAgent()
+                # Get the shared schedule agent (imported and built off the event loop) and create Google Calendar events
+                schedule_agent = await asyncio.to_thread(_get_schedule_agent)
 
                 if schedule_agent.calendar_service:
                     # Recreate the study plan with Google Calendar events
@@ -223,20 +260,12 @@ async def create_study_plan_with_calendar(
                 print(f"Calendar integration error: {calendar_error}")
                 response["google_calendar_result"] = {"success": False, "error": str(calendar_error)}
 
-        # Validate response structure
-        required_keys = ["greeting", "study_plan", "learning_resources", "wellness_insights",
-                        "assessment", "motivational_support", "calendar_events", "metadata"]
-
-        for key in required_keys:
-            if key not in response:
-                response[key] = {} if key != "calendar_events" else []
-
-        return response
+        return _finalize(response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing study plan: {str(e)}")
 
-@app.post("/study-plan-with-pdf")
+@app.post("/study-plan-with-pdf", response_model=StudyResponse, response_class=ORJSONResponse)
 async def create_study_plan_with_pdf(
     file: UploadFile = File(...),
     user_input: str = Form(...),
@@ -253,64 +282,146 @@ async def create_study_plan_with_pdf(
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+    import aiofiles  # only the PDF endpoint needs it
 
-        # Extract text from PDF
-        pdf_content = extract_pdf_text(temp_file_path)
+    temp_file_path = None
+    try:
+        try:
+            # Stream the upload to a temp file in 1 MiB blocks instead of buffering it all
+            async with aiofiles.tempfile.NamedTemporaryFile('wb', suffix='.pdf', delete=False) as temp_file:
+                temp_file_path = temp_file.name
+                while block := await file.read(1 << 20):
+                    await temp_file.write(block)
 
-        # Clean up temp file
-        os.unlink(temp_file_path)
+            try:
+                page_count = await asyncio.to_thread(pdf_page_count, temp_file_path)
+            except Exception:
+                raise HTTPException(status_code=400, detail="The uploaded file is not a readable PDF.")
+
+            # Summarize the book chunk by chunk; summaries run concurrently under the LLM limit
+            # The endpoint owns the extraction pool, so cleanup never runs inside the page generator
+            executor = ThreadPoolExecutor(max_workers=_PDF_WORKERS)
+            pages = iter_pdf_pages(temp_file_path, executor, page_count)
+            tasks, pending = [], set()
+            try:
+                async for chunk in achunk_pages(pages, max_tokens=6000):
+                    # Cap queued summaries so unsummarized chunk text doesn't pile up for the whole book
+                    if len(pending) >= orchestrator.llm_max_concurrency:
+                        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    task = asyncio.create_task(orchestrator.asummarize_chunk(chunk))
+                    tasks.append(task)
+                    pending.add(task)
+                summaries = await asyncio.gather(*tasks)
+            finally:
+                for task in pending:
+                    task.cancel()
+                # Let in-flight page extraction finish (off the event loop) before removing the temp file
+                await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        finally:
+            if temp_file_path is not None:
+                await asyncio.to_thread(os.unlink, temp_file_path)
+
+        pdf_content = "\n\n".join(summaries)
 
         # Create enhanced user input that includes PDF content
         enhanced_input = f"{user_input}\n\n[UPLOADED_BOOK_CONTENT]\n{pdf_content}\n[/UPLOADED_BOOK_CONTENT]"
 
         # Process through orchestrator with PDF context
-        response = orchestrator.process_request(enhanced_input, student_id)
+        response = await orchestrator.aprocess_request(enhanced_input, student_id)
 
         # Add PDF metadata to response
         response["metadata"]["pdf_processed"] = True
-        response["metadata"]["pdf_pages"] = len(pdf_content.split('\n\n'))
+        response["metadata"]["pdf_pages"] = page_count
         response["metadata"]["pdf_filename"] = file.filename
 
-        # Validate response structure
-        required_keys = ["greeting", "study_plan", "learning_resources", "wellness_insights",
-                        "assessment", "motivational_support", "calendar_events", "metadata"]
-
-        for key in required_keys:
-            if key not in response:
-                response[key] = {} if key != "calendar_events" else []
-
-        return StudyResponse(**response)
+        return _finalize(response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing PDF study plan: {str(e)}")
 
-def extract_pdf_text(file_path: str) -> str:
-    """Extract text content from PDF file."""
-    try:
-        doc = fitz.open(file_path)
-        text_content = []
+@lru_cache(maxsize=None)
+def _get_fitz():
+    """Import PyMuPDF on first use so workers that never see a PDF skip loading it."""
+    import fitz  # PyMuPDF for PDF processing
+    return fitz
+
+# Pages per thread-pool task; each task opens its own document handle
+_PDF_PAGES_PER_TASK = 8
+_PDF_WORKERS = os.cpu_count() or 1
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) using a private document handle."""
+    fitz = _get_fitz()
+    # Plain text extraction: dehyphenate, but skip whitespace/ligature preservation work
+    flags = fitz.TEXT_DEHYPHENATE | fitz.TEXT_MEDIABOX_CLIP
+
+    # PyMuPDF documents must not be shared between threads
+    with fitz.open(file_path) as doc:
+        return [doc.load_page(page_num).get_text("text", flags=flags, sort=False)
+                for page_num in range(start, stop)]
+
+def pdf_page_count(file_path: str) -> int:
+    """Return the page count PyMuPDF reads from the document trailer."""
+    with _get_fitz().open(file_path) as doc:
+        return doc.page_count
+
+def iter_pdf_pages(file_path: str, executor: Executor, page_count: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of each PDF page in order.
+
+    Pages are extracted in parallel on executor, one window of _PDF_WORKERS * _PDF_PAGES_PER_TASK
+    pages at a time, so memory stays bounded by the window rather than the whole book.
+    The caller owns executor and shuts it down; the generator holds no other resources.
+    """
+    if page_count is None:
+        page_count = pdf_page_count(file_path)
+
+    window = _PDF_WORKERS * _PDF_PAGES_PER_TASK
+    for window_start in range(0, page_count, window):
+        window_stop = min(window_start + window, page_count)
+        futures = [
+            executor.submit(_extract_page_range, file_path, start,
+                            min(start + _PDF_PAGES_PER_TASK, window_stop))
+            for start in range(window_start, window_stop, _PDF_PAGES_PER_TASK)
+        ]
+
+        page_num = window_start
+        for future in futures:
+            for text in future.result():
+                # Add page separator
+                if page_num > 0:
+                    yield f"\n--- Page {page_num} ---\n{text}"
+                else:
+                    yield text
+                page_num += 1
 
-        for page_num in range(doc.page_count):
-            page = doc.load_page(page_num)
-            text = page.get_text()
+async def achunk_pages(pages: Iterator[str], max_tokens: int = 6000) -> AsyncIterator[str]:
+    """Group page texts into prompt-sized chunks, reading pages off the event loop."""
+    max_chars = max_tokens * 4  # rough chars-per-token estimate
+    chunk, chunk_chars = [], 0
 
-            # Add page separator
-            if page_num > 0:
-                text_content.append(f"\n--- Page {page_num} ---\n")
-            text_content.append(text)
+    while True:
+        page_text = await asyncio.to_thread(next, pages, None)
+        if page_text is None:
+            break
 
-        doc.close()
-        return "".join(text_content)
+        if chunk and chunk_chars + len(page_text) > max_chars:
+            yield "".join(chunk)
+            chunk, chunk_chars = [], 0
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error extracting PDF text: {str(e)}")
+        chunk.append(page_text)
+        chunk_chars += len(page_text)
+
+    if chunk:
+        yield "".join(chunk)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    try:
+        import uvloop  # noqa: F401  (installed by uvicorn[standard], except on Windows)
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, loop=loop, http="httptools",
+                workers=int(os.getenv("WEB_CONCURRENCY", "1")))
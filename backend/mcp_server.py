@@ -2,12 +2,37 @@
 
 import asyncio
 import json
+import os
 from typing import Any, Dict, List, Sequence
 from mcp import Tool, types
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 
+# Clients parse the JSON, so it goes out compact; set MCP_PRETTY_JSON=1 to indent it for debugging
+_PRETTY_JSON = os.getenv("MCP_PRETTY_JSON", "").lower() in ("1", "true", "yes")
+
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if _PRETTY_JSON else 0)
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        if _PRETTY_JSON:
+            return json.dumps(obj, indent=2)
+        return json.dumps(obj, separators=(",", ":"))
+
 from .orchestrator import create_study_assistant
+from .agents import call_lazily, import_lazily
+from .agents.assessment_agent import generate_quiz
+from .agents.motivation_agent import get_motivational_support
+
+# Heavy agent modules load on the first tool call that needs them
+learning_agent = import_lazily(".agents.learning_agent", __package__)
+schedule_agent = import_lazily(".agents.schedule_agent", __package__)
+wellness_agent = import_lazily(".agents.wellness_agent", __package__)
 
 # Create MCP server
 server = Server("student-ai-assistant")
@@ -15,305 +40,305 @@ server = Server("student-ai-assistant")
 # Global orchestrator
 orchestrator = None
 
-@server.list_tools()
-async def handle_list_tools() -> List[types.Tool]:
-    """List available tools."""
-    return [
-        types.Tool(
-            name="create_study_plan",
-            description="Create a personalized study plan using the multi-agent system",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "user_input": {
-                        "type": "string",
-                        "description": "The student's request (e.g., 'Help me prepare for my Machine Learning exam')"
-                    },
-                    "student_id": {
-                        "type": "string",
-                        "description": "Student identifier (optional, defaults to 'demo_student')",
-                        "default": "demo_student"
-                    }
+# Tool, resource and resource-body definitions are static; build them once at import
+_TOOLS: List[types.Tool] = [
+    types.Tool(
+        name="create_study_plan",
+        description="Create a personalized study plan using the multi-agent system",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "user_input": {
+                    "type": "string",
+                    "description": "The student's request (e.g., 'Help me prepare for my Machine Learning exam')"
                 },
-                "required": ["user_input"]
-            }
-        ),
-        types.Tool(
-            name="get_learning_resources",
-            description="Get personalized learning resources for a specific topic",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "topic": {
-                        "type": "string",
-                        "description": "The topic to find resources for"
-                    },
-                    "difficulty": {
-                        "type": "string",
-                        "enum": ["beginner", "intermediate", "advanced"],
-                        "description": "Difficulty level preference",
-                        "default": "intermediate"
+                "student_id": {
+                    "type": "string",
+                    "description": "Student identifier (optional, defaults to 'demo_student')",
+                    "default": "demo_student"
+                }
+            },
+            "required": ["user_input"]
+        }
+    ),
+    types.Tool(
+        name="get_learning_resources",
+        description="Get personalized learning resources for a specific topic",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "topic": {
+                    "type": "string",
+                    "description": "The topic to find resources for"
+                },
+                "difficulty": {
+                    "type": "string",
+                    "enum": ["beginner", "intermediate", "advanced"],
+                    "description": "Difficulty level preference",
+                    "default": "intermediate"
+                }
+            },
+            "required": ["topic"]
+        }
+    ),
+    types.Tool(
+        name="assess_wellness",
+        description="Assess student's current wellness state",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "facial_data": {
+                    "type": "object",
+                    "description": "Facial analysis data (optional)",
+                    "properties": {
+                        "emotion": {"type": "string"},
+                        "fatigue_indicators": {"type": "array", "items": {"type": "string"}}
                     }
                 },
-                "required": ["topic"]
-            }
-        ),
-        types.Tool(
-            name="assess_wellness",
-            description="Assess student's current wellness state",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "facial_data": {
-                        "type": "object",
-                        "description": "Facial analysis data (optional)",
-                        "properties": {
-                            "emotion": {"type": "string"},
-                            "fatigue_indicators": {"type": "array", "items": {"type": "string"}}
-                        }
-                    },
-                    "activity_data": {
-                        "type": "object",
-                        "description": "Physical activity data (optional)",
-                        "properties": {
-                            "steps_today": {"type": "number"},
-                            "active_minutes": {"type": "number"},
-                            "calories_burned": {"type": "number"}
-                        }
+                "activity_data": {
+                    "type": "object",
+                    "description": "Physical activity data (optional)",
+                    "properties": {
+                        "steps_today": {"type": "number"},
+                        "active_minutes": {"type": "number"},
+                        "calories_burned": {"type": "number"}
                     }
                 }
             }
-        ),
-        types.Tool(
-            name="generate_quiz",
-            description="Generate a quiz for assessing understanding",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "topic": {
-                        "type": "string",
-                        "description": "Topic for the quiz"
-                    },
-                    "difficulty": {
-                        "type": "string",
-                        "enum": ["beginner", "intermediate", "advanced"],
-                        "description": "Quiz difficulty level",
-                        "default": "intermediate"
-                    },
-                    "num_questions": {
-                        "type": "number",
-                        "description": "Number of questions to generate",
-                        "default": 5,
-                        "minimum": 1,
-                        "maximum": 10
-                    }
+        }
+    ),
+    types.Tool(
+        name="generate_quiz",
+        description="Generate a quiz for assessing understanding",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "topic": {
+                    "type": "string",
+                    "description": "Topic for the quiz"
                 },
-                "required": ["topic"]
-            }
-        ),
-        types.Tool(
-            name="create_schedule",
-            description="Create a study schedule and calendar events",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "topic": {
-                        "type": "string",
-                        "description": "Topic for the study schedule"
-                    },
-                    "learning_resources": {
-                        "type": "object",
-                        "description": "Learning resources data"
-                    },
-                    "wellness_data": {
-                        "type": "object",
-                        "description": "Wellness assessment data"
-                    }
+                "difficulty": {
+                    "type": "string",
+                    "enum": ["beginner", "intermediate", "advanced"],
+                    "description": "Quiz difficulty level",
+                    "default": "intermediate"
                 },
-                "required": ["topic"]
-            }
-        ),
-        types.Tool(
-            name="get_motivation",
-            description="Generate motivational support and encouragement",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "context": {
-                        "type": "object",
-                        "description": "Context for motivation (performance level, emotional state, etc.)",
-                        "properties": {
-                            "performance_level": {"type": "string"},
-                            "emotional_state": {"type": "string"},
-                            "fatigue_level": {"type": "number"},
-                            "current_topic": {"type": "string"}
-                        }
-                    }
+                "num_questions": {
+                    "type": "number",
+                    "description": "Number of questions to generate",
+                    "default": 5,
+                    "minimum": 1,
+                    "maximum": 10
+                }
+            },
+            "required": ["topic"]
+        }
+    ),
+    types.Tool(
+        name="create_schedule",
+        description="Create a study schedule and calendar events",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "topic": {
+                    "type": "string",
+                    "description": "Topic for the study schedule"
                 },
-                "required": ["context"]
-            }
-        )
-    ]
+                "learning_resources": {
+                    "type": "object",
+                    "description": "Learning resources data"
+                },
+                "wellness_data": {
+                    "type": "object",
+                    "description": "Wellness assessment data"
+                }
+            },
+            "required": ["topic"]
+        }
+    ),
+    types.Tool(
+        name="get_motivation",
+        description="Generate motivational support and encouragement",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "context": {
+                    "type": "object",
+                    "description": "Context for motivation (performance level, emotional state, etc.)",
+                    "properties": {
+                        "performance_level": {"type": "string"},
+                        "emotional_state": {"type": "string"},
+                        "fatigue_level": {"type": "number"},
+                        "current_topic": {"type": "string"}
+                    }
+                }
+            },
+            "required": ["context"]
+        }
+    )
+]
+
+# Argument validators compiled once per tool schema (jsonschema ships with the MCP SDK)
+try:
+    from jsonschema import Draft7Validator
+    _VALIDATORS = {tool.name: Draft7Validator(tool.inputSchema) for tool in _TOOLS}
+except ImportError:
+    _VALIDATORS = {}
+
+@server.list_tools()
+async def handle_list_tools() -> List[types.Tool]:
+    """List available tools."""
+    return _TOOLS
+
+async def _handle_study_plan(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    # Use the main orchestrator method
+    return await orchestrator.aprocess_request(
+        arguments["user_input"],
+        arguments.get("student_id", "demo_student")
+    )
+
+async def _handle_resources(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(call_lazily, learning_agent, "get_learning_resources", arguments["topic"], "demo-key")  # API key handling needed
+
+async def _handle_wellness(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(
+        call_lazily, wellness_agent, "get_wellness_assessment",
+        arguments.get("facial_data"),
+        arguments.get("activity_data")
+    )
+
+async def _handle_quiz(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    learning_data = {
+        "resources": [],
+        "difficulty": arguments.get("difficulty", "intermediate"),
+        "estimated_time": "30 minutes"
+    }
+    return await asyncio.to_thread(
+        generate_quiz,
+        arguments["topic"],
+        learning_data,
+        arguments.get("num_questions", 5)
+    )
+
+async def _handle_schedule(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(
+        call_lazily, schedule_agent, "get_study_plan",
+        arguments["topic"],
+        arguments.get("learning_resources", {}),
+        arguments.get("wellness_data", {})
+    )
+
+async def _handle_motivation(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(get_motivational_support, arguments["context"], "demo-key")
+
+# Tool name -> handler; blocking agent calls run in worker threads
+_HANDLERS = {
+    "create_study_plan": _handle_study_plan,
+    "get_learning_resources": _handle_resources,
+    "assess_wellness": _handle_wellness,
+    "generate_quiz": _handle_quiz,
+    "create_schedule": _handle_schedule,
+    "get_motivation": _handle_motivation
+}
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
     """Handle tool calls."""
-    global orchestrator
-
     if not orchestrator:
         return [types.TextContent(
             type="text",
             text="Error: Orchestrator not initialized. Please check API key configuration."
         )]
 
-    try:
-        if name == "create_study_plan":
-            # Use the main orchestrator method
-            result = orchestrator.process_request(
-                arguments["user_input"],
-                arguments.get("student_id", "demo_student")
-            )
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-
-        elif name == "get_learning_resources":
-            from .agents.learning_agent import get_learning_resources
-            result = get_learning_resources(arguments["topic"], "demo-key")  # API key handling needed
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-
-        elif name == "assess_wellness":
-            from .agents.wellness_agent import get_wellness_assessment
-            result = get_wellness_assessment(
-                arguments.get("facial_data"),
-                arguments.get("activity_data")
-            )
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
+    handler = _HANDLERS.get(name)
+    if not handler:
+        return [types.TextContent(
+            type="text",
+            text=f"Unknown tool: {name}"
+        )]
 
-        elif name == "generate_quiz":
-            from .agents.assessment_agent import generate_quiz
-            learning_data = {
-                "resources": [],
-                "difficulty": arguments.get("difficulty", "intermediate"),
-                "estimated_time": "30 minutes"
-            }
-            result = generate_quiz(
-                arguments["topic"],
-                learning_data,
-                arguments.get("num_questions", 5)
-            )
+    validator = _VALIDATORS.get(name)
+    if validator:
+        error = next(validator.iter_errors(arguments), None)
+        if error:
             return [types.TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=f"Invalid arguments for tool {name}: {error.message}"
             )]
 
-        elif name == "create_schedule":
-            from .agents.schedule_agent import get_study_plan
-            result = get_study_plan(
-                arguments["topic"],
-                arguments.get("learning_resources", {}),
-                arguments.get("wellness_data", {})
-            )
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
+    try:
+        text = _dumps(await handler(arguments))
+    except Exception as e:
+        text = f"Error executing tool {name}: {str(e)}"
 
-        elif name == "get_motivation":
-            from .agents.motivation_agent import get_motivational_support
-            result = get_motivational_support(
-                arguments["context"],
-                "demo-key"
-            )
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
+    return [types.TextContent(type="text", text=text)]
 
-        else:
-            return [types.TextContent(
-                type="text",
-                text=f"Unknown tool: {name}"
-            )]
+_RESOURCES: List[types.Resource] = [
+    types.Resource(
+        uri="student://study-plans",
+        name="Study Plans",
+        description="Collection of generated study plans",
+        mimeType="application/json"
+    ),
+    types.Resource(
+        uri="student://wellness-data",
+        name="Wellness Data",
+        description="Student wellness monitoring data",
+        mimeType="application/json"
+    ),
+    types.Resource(
+        uri="student://learning-analytics",
+        name="Learning Analytics",
+        description="Learning progress and analytics",
+        mimeType="application/json"
+    )
+]
 
-    except Exception as e:
-        return [types.TextContent(
-            type="text",
-            text=f"Error executing tool {name}: {str(e)}"
-        )]
+# Mock resource content for demo, serialized once
+_RESOURCE_BODIES: Dict[str, str] = {
+    "student://study-plans": _dumps({
+        "plans": [
+            {
+                "id": "ml_exam_prep",
+                "topic": "Machine Learning",
+                "created": "2025-01-07",
+                "status": "active"
+            }
+        ]
+    }),
+    "student://wellness-data": _dumps({
+        "current_wellness": {
+            "fatigue_level": 0.3,
+            "stress_level": 0.2,
+            "emotional_state": "focused",
+            "last_updated": "2025-01-07T14:00:00Z"
+        }
+    }),
+    "student://learning-analytics": _dumps({
+        "analytics": {
+            "topics_studied": ["Machine Learning", "Data Science", "Algorithms"],
+            "average_score": 78.5,
+            "study_streak": 5,
+            "total_study_time": "24 hours"
+        }
+    })
+}
 
 @server.list_resources()
 async def handle_list_resources() -> List[types.Resource]:
     """List available resources."""
-    return [
-        types.Resource(
-            uri="student://study-plans",
-            name="Study Plans",
-            description="Collection of generated study plans",
-            mimeType="application/json"
-        ),
-        types.Resource(
-            uri="student://wellness-data",
-            description="Student wellness monitoring data",
-            mimeType="application/json"
-        ),
-        types.Resource(
-            uri="student://learning-analytics",
-            description="Learning progress and analytics",
-            mimeType="application/json"
-        )
-    ]
+    return _RESOURCES
 
 @server.read_resource()
 async def handle_read_resource(uri: str) -> str:
     """Read resource content."""
-    # Mock resource content for demo
-    if uri == "student://study-plans":
-        return json.dumps({
-            "plans": [
-                {
-                    "id": "ml_exam_prep",
-                    "topic": "Machine Learning",
-                    "created": "2025-01-07",
-                    "status": "active"
-                }
-            ]
-        }, indent=2)
-
-    elif uri == "student://wellness-data":
-        return json.dumps({
-            "current_wellness": {
-                "fatigue_level": 0.3,
-                "stress_level": 0.2,
-                "emotional_state": "focused",
-                "last_updated": "2025-01-07T14:00:00Z"
-            }
-        }, indent=2)
-
-    elif uri == "student://learning-analytics":
-        return json.dumps({
-            "analytics": {
-                "topics_studied": ["Machine Learning", "Data Science", "Algorithms"],
-                "average_score": 78.5,
-                "study_streak": 5,
-                "total_study_time": "24 hours"
-            }
-        }, indent=2)
-
-    else:
+    body = _RESOURCE_BODIES.get(str(uri))
+    if body is None:
         raise ValueError(f"Unknown resource: {uri}")
+    return body
 
 async def main():
     """Main entry point for MCP server."""
-    import os
-
     # Initialize orchestrator
     global orchestrator
     api_key = os.getenv("OPENAI_API_KEY", "demo-key")
@@ -1,9 +1,25 @@
 """Orchestrator Agent - Coordinates all agents using LangGraph for multi-agent conversations."""
 
-from typing import Dict, List, Any, Annotated, TypedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Annotated, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 import google.generativeai as genai
+import asyncio
+import contextlib
+import hashlib
 import json
+import operator
+import re
+import time
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # Import all agents
 import sys
@@ -14,139 +30,399 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from agents.learning_agent import get_learning_resources
-from agents.schedule_agent import get_study_plan
-from agents.wellness_agent import get_wellness_assessment
-from agents.assessment_agent import generate_quiz
+from agents import call_lazily, configure_gemini, import_lazily
+from agents.assessment_agent import generate_quiz, build_quiz, quiz_prompt_section, QUIZ_QUESTIONS_SCHEMA
 from agents.personalization_agent import get_personalized_path
 from agents.motivation_agent import get_motivational_support
 
-class OrchestratorState(TypedDict):
+# Agents with heavy dependencies (Google API clients, OpenCV, Hume) load on first use
+learning_agent = import_lazily("agents.learning_agent")
+schedule_agent = import_lazily("agents.schedule_agent")
+wellness_agent = import_lazily("agents.wellness_agent")
+
+# Agents whose Gemini work is folded into one structured request per user request
+_BATCHED_AGENTS = ("learning", "assessment")
+
+# Markdown code fence Gemini sometimes wraps JSON replies in
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+# Request boilerplate stripped off to leave the topic
+_TOPIC_STRIP_RE = re.compile(r'help me (?:prepare for my|with)\s*', re.IGNORECASE)
+
+# Delimiters main.py puts around uploaded book content
+_PDF_START_MARKER = "[UPLOADED_BOOK_CONTENT]"
+_PDF_END_MARKER = "[/UPLOADED_BOOK_CONTENT]"
+
+# Input analysis as a section of the combined Gemini request
+_ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "topic": {"type": "STRING"},
+        "intent": {"type": "STRING"},
+        "complexity": {"type": "STRING"},
+        "has_time_constraint": {"type": "BOOLEAN"},
+        "needs_personalization": {"type": "BOOLEAN"},
+        "has_uploaded_content": {"type": "BOOLEAN"}
+    },
+    "required": ["topic", "intent", "complexity", "has_time_constraint",
+                 "needs_personalization", "has_uploaded_content"]
+}
+_ANALYSIS_PROMPT_SECTION = (
+    "analysis: the student's request broken down into topic (main subject they want to study), "
+    "intent (\"study_planning\", \"resource_finding\", \"assessment\" or \"general_help\"), "
+    "complexity (\"simple\", \"moderate\" or \"complex\") and the booleans has_time_constraint, "
+    "needs_personalization and has_uploaded_content."
+)
+
+# Short requests containing one of these phrases are analyzed heuristically, without Gemini,
+# unless they also mention something that could change the intent
+_SIMPLE_REQUEST_MAX_CHARS = 200
+_SIMPLE_REQUEST_PHRASES = ("prepare for", "help me with", "study")
+_AMBIGUOUS_REQUEST_WORDS = ("resource", "quiz", "article", "video")
+
+# Mock sensor and history data used until real integrations are wired in. Read-only views:
+# they are shared by every request, and the agents only read them.
+_DEMO_FACIAL_DATA = MappingProxyType({
+    "emotion": "focused",
+    "fatigue_indicators": ()
+})
+_DEMO_ACTIVITY_DATA = MappingProxyType({
+    "steps_today": 8500,
+    "active_minutes": 75,
+    "calories_burned": 2100
+})
+_DEMO_PAST_PERFORMANCE = (
+    MappingProxyType({"score": 75, "topic": "mathematics", "date": "2025-01-01"}),
+    MappingProxyType({"score": 82, "topic": "programming", "date": "2025-01-03"}),
+    MappingProxyType({"score": 68, "topic": "algorithms", "date": "2025-01-05"})
+)
+_DEMO_LEARNING_RESOURCES = MappingProxyType({
+    "resources": (MappingProxyType({"title": "Placeholder", "platform": "Demo"}),),
+    "difficulty": "intermediate",
+    "estimated_time": "2 hours"
+})
+_DEMO_WELLNESS_ASSESSMENT = MappingProxyType({
+    "fatigue_level": 0.3,
+    "stress_level": 0.2,
+    "emotional_state": "focused"
+})
+_DEFAULT_LEARNING_DATA = MappingProxyType({
+    "resources": (),
+    "difficulty": "intermediate",
+    "estimated_time": "2 hours"
+})
+
+# Shared read-only default for missing nested outputs, instead of a fresh {} per lookup
+_EMPTY = MappingProxyType({})
+
+# Static parts of every study plan response
+_RESPONSE_TEMPLATE = MappingProxyType({
+    "greeting": "Here's your personalized study plan! 📚"
+})
+_RESPONSE_GENERATED_AT = "2025-01-07T14:00:00Z"
+
+def _split_pdf_content(user_input: str) -> Tuple[str, Optional[str]]:
+    """Split the uploaded-book block off a request; returns (request text, book content or None).
+
+    One find() per marker and a single slice, since the book block can be large.
+    """
+    start = user_input.find(_PDF_START_MARKER)
+    end = user_input.find(_PDF_END_MARKER, start) if start != -1 else -1
+    if end == -1:
+        return user_input, None
+
+    pdf_content = user_input[start + len(_PDF_START_MARKER):end].strip()
+    return (user_input[:start] + user_input[end + len(_PDF_END_MARKER):]).strip(), pdf_content
+
+def _session_id(student_id: str, user_input: str) -> str:
+    """Session id that is stable across processes; hashes at most 256 characters of input."""
+    digest = hashlib.blake2b(user_input[:256].encode(), digest_size=4).digest()
+    return f"session_{student_id}_{int.from_bytes(digest, 'big') % 10000}"
+
+class _TTLCache:
+    """Small LRU cache with an optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Any, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+@dataclass(slots=True)
+class OrchestratorState:
     """State for the orchestrator graph."""
     user_input: str
-    topic: str
-    student_id: str
-    conversation_history: List[Dict[str, Any]]
-    current_step: str
-    agent_outputs: Dict[str, Any]
-    final_response: Dict[str, Any]
-    metadata: Dict[str, Any]
+    topic: str = ""
+    student_id: str = "demo_student"
+    # Parallel branches each return their own key; the reducer merges them
+    agent_outputs: Annotated[Dict[str, Any], operator.or_] = field(default_factory=dict)
+    final_response: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 class StudentAOrchestrator:
     """Main orchestrator using LangGraph for multi-agent coordination."""
 
+    _ANALYSIS_CONFIG = genai.types.GenerationConfig(temperature=0.3, max_output_tokens=300)
+    _SUMMARY_CONFIG = genai.types.GenerationConfig(temperature=0.3, max_output_tokens=400)
+
     def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
+        configure_gemini(gemini_api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
 
-        # Build the LangGraph
-        self.graph = self._build_graph()
-
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph state machine."""
-        graph = StateGraph(OrchestratorState)
-
-        # Add nodes (agent functions)
-        graph.add_node("analyze_input", self._analyze_user_input)
-        graph.add_node("personalization_agent", self._run_personalization_agent)
-        graph.add_node("learning_agent", self._run_learning_agent)
-        graph.add_node("wellness_agent", self._run_wellness_agent)
-        graph.add_node("assessment_agent", self._run_assessment_agent)
-        graph.add_node("schedule_agent", self._run_schedule_agent)
-        graph.add_node("motivation_agent", self._run_motivation_agent)
-        graph.add_node("coordinate_response", self._coordinate_final_response)
-
-        # Define the flow
-        graph.add_edge(START, "analyze_input")
-
-        # Branching logic - analyze input determines which agents to run
-        graph.add_conditional_edges(
-            "analyze_input",
-            self._route_to_agents,
-            {
-                "personalization_first": "personalization_agent",
-                "learning_focused": "learning_agent",
-                "comprehensive_study": "personalization_agent"
-            }
-        )
+        # Bound concurrent LLM-backed agent calls across all requests to stay under rate limits.
+        # One agent call may issue several Gemini requests, so this caps agent calls, not model calls.
+        self.llm_max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "6"))
+        # One semaphore per event loop: a semaphore can't be shared across loops, and each
+        # process_request call runs on its own loop
+        self._llm_sems = weakref.WeakKeyDictionary()
+        self.llm_in_flight = 0
 
-        # Agent processing flow
-        graph.add_edge("personalization_agent", "learning_agent")
-        graph.add_edge("personalization_agent", "wellness_agent")
-        graph.add_edge("learning_agent", "assessment_agent")
-        graph.add_edge("wellness_agent", "schedule_agent")
-        graph.add_edge("assessment_agent", "motivation_agent")
-        graph.add_edge("schedule_agent", "motivation_agent")
-        graph.add_edge("motivation_agent", "coordinate_response")
-        graph.add_edge("coordinate_response", END)
+        # Responses for idempotent requests such as the /demo endpoint
+        self.response_cache = _TTLCache(maxsize=1024, ttl=300)
+        # Gemini input analyses, keyed by the PDF-stripped request text
+        self.analysis_cache = _TTLCache(maxsize=1024)
 
-        return graph.compile()
+        # The compiled LangGraph, shared by all instances
+        self.graph = _GRAPH
 
     def _extract_topic(self, user_input: str) -> str:
         """Extract topic from user input."""
         # Simple extraction - can be improved with LLM
-        cleaned_input = user_input.lower().replace("help me prepare for my", "").replace("help me with", "").strip()
-        return cleaned_input
+        return _TOPIC_STRIP_RE.sub('', user_input, count=1).strip()
 
     def process_request(self, user_input: str, student_id: str = "demo_student") -> Dict[str, Any]:
-        """Process a student request through the multi-agent system using sequential workflow."""
-        # Extract topic from input
+        """Process a student request through the multi-agent system.
+
+        Blocking wrapper around aprocess_request for scripts that have no event loop.
+        Must not be called while an event loop is running in this thread (asyncio.run
+        raises RuntimeError); await aprocess_request there instead.
+        """
+        return asyncio.run(self.aprocess_request(user_input, student_id))
+
+    async def aprocess_request(self, user_input: str, student_id: str = "demo_student",
+                               requested_agents: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Async version of process_request that runs independent agents concurrently.
+
+        The agents are blocking (Gemini/HTTP calls), so each one runs in a worker thread
+        and only the real data dependencies are awaited in order. The Gemini work of the
+        learning and assessment agents is made in one structured request; requested_agents
+        limits which of those sections are generated (default: all).
+        """
+        # Uploaded book content goes to the learning agent, not into the topic
+        user_input, pdf_content = _split_pdf_content(user_input)
         topic = self._extract_topic(user_input)
+        sections = [name for name in _BATCHED_AGENTS if requested_agents is None or name in requested_agents]
 
-        # Get actual wellness assessment
-        facial_data = {
-            "emotion": "focused",
-            "fatigue_indicators": []
-        }
-        activity_data = {
-            "steps_today": 8500,
-            "active_minutes": 75,
-            "calories_burned": 2100
-        }
-        wellness_assessment = get_wellness_assessment(facial_data, activity_data)
-
-        # Get personalized path (this uses mock data currently)
-        past_performance = [
-            {"score": 75, "topic": "mathematics", "date": "2025-01-01"},
-            {"score": 82, "topic": "programming", "date": "2025-01-03"},
-            {"score": 68, "topic": "algorithms", "date": "2025-01-05"}
-        ]
-        learning_resources_mock = {
-            "resources": [{"title": "Placeholder", "platform": "Demo"}],
-            "difficulty": "intermediate",
-            "estimated_time": "2 hours"
-        }
-        personalized_path = get_personalized_path(
-            topic=topic,
-            learning_resources=learning_resources_mock,
-            wellness_assessment=wellness_assessment,
-            student_id=student_id,
-            past_performance=past_performance
+        # Stage 1: wellness and the combined Gemini request don't depend on anything
+        wellness_assessment, batch = await asyncio.gather(
+            asyncio.to_thread(call_lazily, wellness_agent, "get_wellness_assessment", _DEMO_FACIAL_DATA, _DEMO_ACTIVITY_DATA),
+            self._call_llm(self._batched_generate, topic, sections, 3)
         )
 
-        # Now get actual learning resources (this calls Gemini)
-        pdf_content = None
-        learning_resources = get_learning_resources(topic, None, pdf_content)
+        # Articles: [] skips generation, None lets the agent call Gemini itself
+        articles = batch.get("articles") if "learning" in sections else []
+        learning_resources = await self._call_llm(call_lazily, learning_agent, "get_learning_resources", topic, None, pdf_content, articles)
+
+        # Stage 2: everything else only needs the results above
+        _, quiz, study_plan, motivation = await asyncio.gather(
+            asyncio.to_thread(
+                get_personalized_path,
+                topic=topic,
+                learning_resources=_DEMO_LEARNING_RESOURCES,
+                wellness_assessment=wellness_assessment,
+                student_id=student_id,
+                past_performance=_DEMO_PAST_PERFORMANCE
+            ),
+            self._aget_quiz(topic, learning_resources, sections, batch),
+            asyncio.to_thread(call_lazily, schedule_agent, "get_study_plan", topic, learning_resources, wellness_assessment),
+            asyncio.to_thread(get_motivational_support, self._motivation_context(topic, wellness_assessment), None)
+        )
 
-        # Generate quiz (this calls Gemini)
-        quiz = generate_quiz(topic, learning_resources, num_questions=3, api_key=None)
+        return self._format_response(user_input, student_id, topic, study_plan, learning_resources,
+                                     wellness_assessment, quiz, motivation)
+
+    async def acached_process_request(self, user_input: str, student_id: str = "demo_student",
+                                      requested_agents: Optional[List[str]] = None) -> Dict[str, Any]:
+        """aprocess_request with a 5 minute response cache, for idempotent callers.
+
+        Inputs are normalized (trimmed, lowercased) before hashing to improve the hit rate.
+        Callers must treat the returned dict as read-only since it is shared between hits.
+        """
+        agents = ",".join(sorted(requested_agents)) if requested_agents is not None else "*"
+        key = hashlib.blake2b(
+            f"{student_id}\0{agents}\0{user_input.strip().lower()}".encode(), digest_size=16
+        ).digest()
+
+        response = self.response_cache.get(key)
+        if response is None:
+            response = await self.aprocess_request(user_input, student_id, requested_agents)
+            self.response_cache.set(key, response)
+        return response
+
+    async def arun_graph(self, user_input: str, student_id: str = "demo_student") -> Dict[str, Any]:
+        """Run the request through the LangGraph workflow; independent branches run concurrently."""
+        state = await self.graph.ainvoke(OrchestratorState(
+            user_input=user_input,
+            student_id=student_id,
+            metadata={"session_id": _session_id(student_id, user_input)}
+        ), config={"configurable": {"orchestrator": self}})
+        return state["final_response"]
+
+    async def _aget_quiz(self, topic: str, learning_resources: Dict[str, Any], sections: List[str],
+                         batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Quiz from the combined request, falling back to the assessment agent's own calls."""
+        if "assessment" not in sections:
+            return {}
+        if batch.get("quiz_questions"):
+            return build_quiz(topic, learning_resources, batch["quiz_questions"])
+        return await self._call_llm(generate_quiz, topic, learning_resources, num_questions=3, api_key=None)
+
+    def _batched_generate(self, topic: str, sections: List[str], num_questions: int = 3,
+                          user_input: Optional[str] = None) -> Dict[str, Any]:
+        """Generate the requested agent sections with a single structured Gemini call.
+
+        The "analysis" section needs user_input. Returns an empty dict on any failure so
+        each agent falls back to its own requests.
+        """
+        parts = []
+        properties = {}
+        if "analysis" in sections:
+            parts.append(_ANALYSIS_PROMPT_SECTION)
+            properties["analysis"] = _ANALYSIS_SCHEMA
+        if "learning" in sections:
+            parts.append(learning_agent.articles_prompt_section(topic))
+            properties["articles"] = learning_agent.ARTICLES_SCHEMA
+        if "assessment" in sections:
+            parts.append(quiz_prompt_section(topic, num_questions))
+            properties["quiz_questions"] = QUIZ_QUESTIONS_SCHEMA
+
+        if not parts:
+            return {}
+
+        section_list = "\n".join(f"- {part}" for part in parts)
+        intro = f"Student request: {user_input}" if user_input else f"You are helping a student study {topic}."
+        prompt = f"""{intro}
+
+Return a JSON object with these keys:
+{section_list}
+
+Return ONLY the JSON object, no other text."""
 
-        # Create study plan
-        study_plan = get_study_plan(topic, learning_resources, wellness_assessment)
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": 0.7,
+                    "max_output_tokens": 2048,
+                    "response_mime_type": "application/json",
+                    "response_schema": {
+                        "type": "OBJECT",
+                        "properties": properties,
+                        "required": list(properties)
+                    }
+                }
+            )
+            result = _json_loads(response.text)
+            return result if isinstance(result, dict) else {}
+        except Exception as e:
+            print(f"Batched Gemini generation error: {e}")
+            return {}
 
-        # Get motivational support (this uses logic, not LLM directly)
-        motivation_context = {
+    async def asummarize_chunk(self, chunk: str) -> str:
+        """Summarize one chunk of uploaded book content for use in the study plan prompt."""
+        return await self._call_llm(self._summarize_chunk, chunk)
+
+    def _summarize_chunk(self, chunk: str) -> str:
+        """Blocking Gemini call behind asummarize_chunk."""
+        prompt = f"""Summarize this excerpt from a student's study material.
+
+List the main topics and key concepts it covers in a few short paragraphs.
+
+Excerpt:
+{chunk}
+
+Return ONLY the summary, no other text."""
+
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self._SUMMARY_CONFIG
+            )
+            if response.text:
+                return response.text.strip()
+        except Exception as e:
+            print(f"PDF chunk summary error: {e}")
+
+        # Fallback: keep the start of the raw excerpt
+        return chunk[:1000]
+
+    @contextlib.asynccontextmanager
+    async def _llm_slot(self):
+        """Hold one of the LLM_MAX_CONCURRENCY agent-call slots, counted in llm_in_flight."""
+        loop = asyncio.get_running_loop()
+        sem = self._llm_sems.get(loop)
+        if sem is None:
+            sem = self._llm_sems[loop] = asyncio.Semaphore(self.llm_max_concurrency)
+
+        async with sem:
+            self.llm_in_flight += 1
+            try:
+                yield
+            finally:
+                self.llm_in_flight -= 1
+
+    async def _call_llm(self, agent_fn, *args, **kwargs) -> Any:
+        """Run a blocking LLM-backed agent call in a worker thread, bounded by LLM_MAX_CONCURRENCY."""
+        async with self._llm_slot():
+            return await asyncio.to_thread(agent_fn, *args, **kwargs)
+
+    def _motivation_context(self, topic: str, wellness_assessment: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the motivation agent context for a new study session."""
+        return {
             "performance_level": "good_performance",
             "emotional_state": wellness_assessment["emotional_state"],
             "fatigue_level": wellness_assessment["fatigue_level"],
             "progress_milestone": True,
             "current_topic": topic
         }
-        motivation = get_motivational_support(motivation_context, None)
 
-        # Format comprehensive response
+    def _format_response(self, user_input: str, student_id: str, topic: str, study_plan: Dict[str, Any],
+                         learning_resources: Dict[str, Any], wellness_assessment: Dict[str, Any],
+                         quiz: Dict[str, Any], motivation: Dict[str, Any]) -> Dict[str, Any]:
+        """Format the agent outputs into the API response shape."""
+        questions = quiz.get("questions") or ()
         return {
-            "greeting": "Here's your personalized study plan! 📚",
+            **_RESPONSE_TEMPLATE,
             "study_plan": {
                 "topic": topic,
                 "duration": study_plan.get("total_duration", "2 hours"),
@@ -163,40 +439,93 @@ class StudentAOrchestrator:
                 "recommendations": wellness_assessment.get("recommendations", [])[:2]
             },
             "assessment": {
-                "available_quiz": bool(quiz.get("questions")),
-                "question_count": len(quiz.get("questions", [])),
+                "available_quiz": bool(questions),
+                "question_count": len(questions),
                 "estimated_time": quiz.get("estimated_time", "3 minutes")
             },
             "motivational_support": {
                 "primary_message": motivation.get("primary_message", "You've got this!"),
-                "next_goal": motivation.get("next_goal", {}).get("goal", "Complete your first study session")
+                "next_goal": (motivation.get("next_goal") or _EMPTY).get("goal", "Complete your first study session")
             },
             "calendar_events": study_plan.get("calendar_events", []),
             "metadata": {
-                "generated_at": "2025-01-07T14:00:00Z",
-                "session_id": f"session_{student_id}_{hash(user_input) % 10000}"
+                "generated_at": _RESPONSE_GENERATED_AT,
+                "session_id": _session_id(student_id, user_input)
             }
         }
 
-    def _analyze_user_input(self, state: OrchestratorState) -> OrchestratorState:
+    async def _analyze_user_input(self, state: OrchestratorState) -> Dict[str, Any]:
         """Analyze user input to extract topic and determine processing strategy."""
-        user_input = state["user_input"]
+        user_input = state.user_input
 
-        # Check for PDF content
-        pdf_content = None
-        has_pdf = False
-        if "[UPLOADED_BOOK_CONTENT]" in user_input and "[/UPLOADED_BOOK_CONTENT]" in user_input:
-            has_pdf = True
-            # Extract PDF content
-            start_marker = "[UPLOADED_BOOK_CONTENT]"
-            end_marker = "[/UPLOADED_BOOK_CONTENT]"
-            start_idx = user_input.find(start_marker) + len(start_marker)
-            end_idx = user_input.find(end_marker)
-            pdf_content = user_input[start_idx:end_idx].strip()
-
-            # Remove PDF content from user input for analysis
-            user_input = user_input.replace(user_input[start_idx-len(start_marker):end_idx+len(end_marker)], "").strip()
+        # Remove PDF content from user input for analysis
+        user_input, pdf_content = _split_pdf_content(user_input)
+        has_pdf = pdf_content is not None
+
+        topic = self._extract_topic(user_input)
+        sections = list(_BATCHED_AGENTS)
+        if self._is_simple_request(user_input):
+            analysis = self._heuristic_analysis(user_input, has_pdf)
+        else:
+            # Identical requests get identical analyses; skip the Gemini work on repeats
+            cache_key = hashlib.blake2b(user_input.encode(), digest_size=16).digest()
+            analysis = self.analysis_cache.get(cache_key)
+            if analysis is None:
+                sections.append("analysis")
+                topic = "the topic of the student's request"
+            else:
+                topic = analysis.get("topic", topic)
+
+        # One Gemini round-trip for the analysis (when needed), articles and quiz questions
+        batch = await self._call_llm(self._batched_generate, topic, sections, 3, user_input)
+
+        if analysis is None:
+            analysis = batch.get("analysis")
+            if not isinstance(analysis, dict):
+                try:
+                    analysis = await self._gemini_analysis(user_input)
+                except:
+                    analysis = None
+            if analysis:
+                self.analysis_cache.set(cache_key, analysis)
+            else:
+                analysis = self._heuristic_analysis(user_input, has_pdf)
+
+        metadata = {**state.metadata, "analysis": analysis, "has_pdf": has_pdf}
+        agent_outputs = {"batch": batch}
 
+        if has_pdf and pdf_content:
+            metadata["pdf_content_preview"] = pdf_content[:1000] + "..." if len(pdf_content) > 1000 else pdf_content
+            # Store PDF content for agents to use
+            agent_outputs["pdf_content"] = pdf_content
+
+        return {
+            "topic": analysis.get("topic", "general studies"),
+            "metadata": metadata,
+            "agent_outputs": agent_outputs
+        }
+
+    def _is_simple_request(self, user_input: str) -> bool:
+        """Whether the heuristic analysis is as good as Gemini's for this request."""
+        if len(user_input) >= _SIMPLE_REQUEST_MAX_CHARS:
+            return False
+        lowered = user_input.lower()
+        return (any(phrase in lowered for phrase in _SIMPLE_REQUEST_PHRASES)
+                and not any(word in lowered for word in _AMBIGUOUS_REQUEST_WORDS))
+
+    def _heuristic_analysis(self, user_input: str, has_pdf: bool) -> Dict[str, Any]:
+        """Analysis built from the request text alone; also the fallback when Gemini fails."""
+        return {
+            "topic": self._extract_topic(user_input),
+            "intent": "study_planning",
+            "complexity": "moderate",
+            "has_time_constraint": False,
+            "needs_personalization": True,
+            "has_uploaded_content": has_pdf
+        }
+
+    async def _gemini_analysis(self, user_input: str) -> Dict[str, Any]:
+        """Ask Gemini for the topic/intent analysis of a (PDF-stripped) request."""
         prompt = f"""Analyze the student's request to extract key information.
 
 Return a JSON object with these exact keys:
@@ -211,169 +540,97 @@ Student request: {user_input}
 
 Return ONLY the JSON object, no other text."""
 
-        try:
-            response = self.model.generate_content(
+        async with self._llm_slot():
+            response = await self.model.generate_content_async(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=300
-                )
+                generation_config=self._ANALYSIS_CONFIG
             )
 
-            content = response.text
-            if content:
-                # Clean content if needed
-                content = content.strip()
-                if content.startswith('```json'):
-                    content = content[7:]
-                if content.endswith('```'):
-                    content = content[:-3]
-                content = content.strip()
-
-                analysis = json.loads(content)
-            else:
-                raise ValueError("Empty response from Gemini")
-        except:
-            # Fallback analysis
-            analysis = {
-                "topic": user_input.replace("Help me prepare for my", "").replace("Help me with", "").strip(),
-                "intent": "study_planning",
-                "complexity": "moderate",
-                "has_time_constraint": False,
-                "needs_personalization": True,
-                "has_uploaded_content": has_pdf
-            }
-
-        state["topic"] = analysis.get("topic", "general studies")
-        state["metadata"]["analysis"] = analysis
-        state["metadata"]["has_pdf"] = has_pdf
-
-        if has_pdf and pdf_content:
-            state["metadata"]["pdf_content_preview"] = pdf_content[:1000] + "..." if len(pdf_content) > 1000 else pdf_content
-            # Store PDF content for agents to use
-            state["agent_outputs"]["pdf_content"] = pdf_content
-
-        return state
+        content = response.text
+        if content:
+            return _json_loads(_FENCE_RE.sub('', content))
+        else:
+            raise ValueError("Empty response from Gemini")
 
-    def _run_personalization_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_personalization_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run personalization agent to understand student profile."""
-        # Mock past performance for demo
-        past_performance = [
-            {"score": 75, "topic": "mathematics", "date": "2025-01-01"},
-            {"score": 82, "topic": "programming", "date": "2025-01-03"},
-            {"score": 68, "topic": "algorithms", "date": "2025-01-05"}
-        ]
-
-        # Mock initial learning resources (will be populated by learning agent)
-        learning_resources = {
-            "resources": [{"title": "Placeholder", "platform": "Demo"}],
-            "difficulty": "intermediate",
-            "estimated_time": "2 hours"
-        }
-
-        # Mock wellness data (will be populated by wellness agent)
-        wellness_assessment = {
-            "fatigue_level": 0.3,
-            "stress_level": 0.2,
-            "emotional_state": "focused"
-        }
-
-        personalized_path = get_personalized_path(
-            topic=state["topic"],
-            learning_resources=learning_resources,
-            wellness_assessment=wellness_assessment,
-            student_id=state["student_id"],
-            past_performance=past_performance
+        # Mock past performance, plus placeholder learning resources and wellness data
+        # (the real ones come from the learning and wellness agents)
+        personalized_path = await asyncio.to_thread(
+            get_personalized_path,
+            topic=state.topic,
+            learning_resources=_DEMO_LEARNING_RESOURCES,
+            wellness_assessment=_DEMO_WELLNESS_ASSESSMENT,
+            student_id=state.student_id,
+            past_performance=_DEMO_PAST_PERFORMANCE
         )
 
-        state["agent_outputs"]["personalization"] = personalized_path
-        return state
+        return {"agent_outputs": {"personalization": personalized_path}}
 
-    def _run_learning_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_learning_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run learning resource agent."""
-        topic = state["topic"]
+        topic = state.topic
 
         # Check for PDF content
-        pdf_content = state["agent_outputs"].get("pdf_content")
+        pdf_content = state.agent_outputs.get("pdf_content")
 
         # Get personalized preferences if available
-        personalization_data = state["agent_outputs"].get("personalization", {})
+        personalization_data = state.agent_outputs.get("personalization") or _EMPTY
         preferred_platforms = []
 
         if personalization_data:
-            profile = personalization_data.get("student_profile", {})
+            profile = personalization_data.get("student_profile") or _EMPTY
             learning_style = profile.get("learning_style", "visual")
             if learning_style == "visual":
                 preferred_platforms = ["YouTube", "GeeksforGeeks"]
             elif learning_style == "auditory":
                 preferred_platforms = ["YouTube", "podcasts"]
 
-        learning_resources = get_learning_resources(topic, None, pdf_content)
-        state["agent_outputs"]["learning"] = learning_resources
-
-        return state
+        # Articles from the combined request; None lets the agent call Gemini itself
+        articles = (state.agent_outputs.get("batch") or _EMPTY).get("articles")
+        learning_resources = await self._call_llm(call_lazily, learning_agent, "get_learning_resources", topic, None, pdf_content, articles)
+        return {"agent_outputs": {"learning": learning_resources}}
 
-    def _run_wellness_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_wellness_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run wellness assessment agent."""
         # Mock wellness data - in real implementation would come from sensors
-        facial_data = {
-            "emotion": "focused",
-            "fatigue_indicators": []
-        }
+        wellness_assessment = await asyncio.to_thread(call_lazily, wellness_agent, "get_wellness_assessment", _DEMO_FACIAL_DATA, _DEMO_ACTIVITY_DATA)
+        return {"agent_outputs": {"wellness": wellness_assessment}}
 
-        activity_data = {
-            "steps_today": 8500,
-            "active_minutes": 75,
-            "calories_burned": 2100
-        }
-
-        wellness_assessment = get_wellness_assessment(facial_data, activity_data)
-        state["agent_outputs"]["wellness"] = wellness_assessment
-
-        return state
-
-    def _run_assessment_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_assessment_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run assessment agent to generate quiz."""
-        learning_data = state["agent_outputs"].get("learning", {
-            "resources": [],
-            "difficulty": "intermediate",
-            "estimated_time": "2 hours"
-        })
-
-        quiz = generate_quiz(state["topic"], learning_data, num_questions=3, api_key=None)
-        state["agent_outputs"]["assessment"] = quiz
+        learning_data = state.agent_outputs.get("learning", _DEFAULT_LEARNING_DATA)
 
-        return state
+        quiz = await self._aget_quiz(state.topic, learning_data, _BATCHED_AGENTS,
+                                     state.agent_outputs.get("batch") or _EMPTY)
+        return {"agent_outputs": {"assessment": quiz}}
 
-    def _run_schedule_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_schedule_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run schedule agent to create study plan."""
-        learning_data = state["agent_outputs"].get("learning", {})
-        wellness_data = state["agent_outputs"].get("wellness", {})
+        learning_data = state.agent_outputs.get("learning") or _EMPTY
+        wellness_data = state.agent_outputs.get("wellness") or _EMPTY
 
-        study_plan = get_study_plan(state["topic"], learning_data, wellness_data)
-        state["agent_outputs"]["schedule"] = study_plan
+        study_plan = await asyncio.to_thread(call_lazily, schedule_agent, "get_study_plan", state.topic, learning_data, wellness_data)
+        return {"agent_outputs": {"schedule": study_plan}}
 
-        return state
-
-    def _run_motivation_agent(self, state: OrchestratorState) -> OrchestratorState:
+    async def _run_motivation_agent(self, state: OrchestratorState) -> Dict[str, Any]:
         """Run motivation agent to provide encouragement."""
         # Gather context from other agents
+        wellness = state.agent_outputs.get("wellness") or _EMPTY
         context = {
             "performance_level": "good_performance",  # Default for new session
-            "emotional_state": state["agent_outputs"].get("wellness", {}).get("emotional_state", "neutral"),
-            "fatigue_level": state["agent_outputs"].get("wellness", {}).get("fatigue_level", 0.3),
+            "emotional_state": wellness.get("emotional_state", "neutral"),
+            "fatigue_level": wellness.get("fatigue_level", 0.3),
             "progress_milestone": True,  # Starting a new study plan is a milestone
-            "current_topic": state["topic"]
+            "current_topic": state.topic
         }
 
-        motivational_support = get_motivational_support(context, None)
-        state["agent_outputs"]["motivation"] = motivational_support
-
-        return state
+        motivational_support = await asyncio.to_thread(get_motivational_support, context, None)
+        return {"agent_outputs": {"motivation": motivational_support}}
 
     def _route_to_agents(self, state: OrchestratorState) -> str:
         """Route to appropriate agent sequence based on analysis."""
-        analysis = state["metadata"].get("analysis", {})
+        analysis = state.metadata.get("analysis") or _EMPTY
         intent = analysis.get("intent", "study_planning")
         needs_personalization = analysis.get("needs_personalization", True)
 
@@ -384,21 +641,24 @@ Return ONLY the JSON object, no other text."""
         else:
             return "personalization_first"
 
-    def _coordinate_final_response(self, state: OrchestratorState) -> OrchestratorState:
+    def _coordinate_final_response(self, state: OrchestratorState) -> Dict[str, Any]:
         """Coordinate and format the final response for the user."""
-        agent_outputs = state["agent_outputs"]
+        agent_outputs = state.agent_outputs
 
         # Build comprehensive response
-        study_plan = agent_outputs.get("schedule", {}).get("study_plan", {})
-        learning_resources = agent_outputs.get("learning", {})
-        wellness_info = agent_outputs.get("wellness", {})
-        quiz = agent_outputs.get("assessment", {})
-        motivation = agent_outputs.get("motivation", {})
+        schedule = agent_outputs.get("schedule") or _EMPTY
+        study_plan = schedule.get("study_plan") or _EMPTY
+        learning_resources = agent_outputs.get("learning") or _EMPTY
+        wellness_info = agent_outputs.get("wellness") or _EMPTY
+        quiz = agent_outputs.get("assessment") or _EMPTY
+        motivation = agent_outputs.get("motivation") or _EMPTY
+
+        questions = quiz.get("questions") or ()
 
         final_response = {
-            "greeting": "Here's your personalized study plan! 📚",
+            **_RESPONSE_TEMPLATE,
             "study_plan": {
-                "topic": study_plan.get("topic", state["topic"]),
+                "topic": study_plan.get("topic", state.topic),
                 "duration": study_plan.get("total_duration", "2 hours"),
                 "difficulty": study_plan.get("difficulty", "intermediate"),
                 "sessions": study_plan.get("sessions", [])
@@ -413,23 +673,75 @@ Return ONLY the JSON object, no other text."""
                 "recommendations": wellness_info.get("recommendations", [])[:2]  # Top 2
             },
             "assessment": {
-                "available_quiz": bool(quiz.get("questions")),
-                "question_count": len(quiz.get("questions", [])),
+                "available_quiz": bool(questions),
+                "question_count": len(questions),
                 "estimated_time": quiz.get("estimated_time", "3 minutes")
             },
             "motivational_support": {
                 "primary_message": motivation.get("primary_message", "You've got this!"),
-                "next_goal": motivation.get("next_goal", {}).get("goal", "Complete your first study session")
+                "next_goal": (motivation.get("next_goal") or _EMPTY).get("goal", "Complete your first study session")
             },
-            "calendar_events": agent_outputs.get("schedule", {}).get("calendar_events", []),
+            "calendar_events": schedule.get("calendar_events", []),
             "metadata": {
-                "generated_at": "2025-01-07T14:00:00Z",
-                "session_id": state["metadata"]["session_id"]
+                "generated_at": _RESPONSE_GENERATED_AT,
+                "session_id": state.metadata["session_id"]
             }
         }
 
-        state["final_response"] = final_response
-        return state
+        return {"final_response": final_response}
+
+def _orchestrator_node(method):
+    """Adapt an orchestrator method into a graph node that runs on the instance in the run config."""
+    if asyncio.iscoroutinefunction(method):
+        async def node(state: OrchestratorState, config: RunnableConfig):
+            return await method(config["configurable"]["orchestrator"], state)
+    else:
+        def node(state: OrchestratorState, config: RunnableConfig):
+            return method(config["configurable"]["orchestrator"], state)
+    return node
+
+def _build_graph() -> StateGraph:
+    """Build and compile the LangGraph state machine once; every orchestrator shares it."""
+    graph = StateGraph(OrchestratorState)
+
+    # Add nodes (agent functions)
+    graph.add_node("analyze_input", _orchestrator_node(StudentAOrchestrator._analyze_user_input))
+    graph.add_node("personalization_agent", _orchestrator_node(StudentAOrchestrator._run_personalization_agent))
+    graph.add_node("learning_agent", _orchestrator_node(StudentAOrchestrator._run_learning_agent))
+    graph.add_node("wellness_agent", _orchestrator_node(StudentAOrchestrator._run_wellness_agent))
+    graph.add_node("assessment_agent", _orchestrator_node(StudentAOrchestrator._run_assessment_agent))
+    graph.add_node("schedule_agent", _orchestrator_node(StudentAOrchestrator._run_schedule_agent))
+    graph.add_node("motivation_agent", _orchestrator_node(StudentAOrchestrator._run_motivation_agent))
+    graph.add_node("coordinate_response", _orchestrator_node(StudentAOrchestrator._coordinate_final_response))
+
+    # Define the flow
+    graph.add_edge(START, "analyze_input")
+
+    # Branching logic - analyze input determines which agents to run
+    graph.add_conditional_edges(
+        "analyze_input",
+        _orchestrator_node(StudentAOrchestrator._route_to_agents),
+        {
+            "personalization_first": "personalization_agent",
+            "learning_focused": "learning_agent",
+            "comprehensive_study": "personalization_agent"
+        }
+    )
+
+    # Agent processing flow
+    graph.add_edge("personalization_agent", "learning_agent")
+    graph.add_edge("personalization_agent", "wellness_agent")
+    graph.add_edge("learning_agent", "assessment_agent")
+    graph.add_edge("wellness_agent", "schedule_agent")
+    graph.add_edge("assessment_agent", "motivation_agent")
+    graph.add_edge("schedule_agent", "motivation_agent")
+    graph.add_edge("motivation_agent", "coordinate_response")
+    graph.add_edge("coordinate_response", END)
+
+    return graph.compile()
+
+# Compiled at import; runs pass their orchestrator in config["configurable"]
+_GRAPH = _build_graph()
 
 def create_study_assistant(api_key: str) -> StudentAOrchestrator:
     """Factory function to create the orchestrator."""
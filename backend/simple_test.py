@@ -1,58 +1,57 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+import traceback
+from dotenv import load_dotenv
+
+# 1x1 PNG test image as a data URL, built once
+_TEST_PIXEL_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
+_TEST_PIXEL_URL = f"data:image/png;base64,{_TEST_PIXEL_B64}"
+
+# Result-retrieval methods checked on the job class (or a submitted job with --live)
+_JOB_METHODS = ("get_job_result", "await_complete", "wait_for_completion", "get_predictions")
+
 print("Testing Hume import...")
 
 try:
-    from hume import HumeBatchClient
+    from hume import BatchJob, HumeBatchClient
+    HUME_AVAILABLE = True
     print("✅ Hume import successful")
 except Exception as e:
+    HUME_AVAILABLE = False
     print(f"❌ Hume import failed: {e}")
 
+# Same import path as agents/wellness_agent.py
 try:
     from hume.models import BurstConfig, FacemeshConfig
+    HUME_MODELS_AVAILABLE = True
     print("✅ Hume models import successful")
 except Exception as e:
+    HUME_MODELS_AVAILABLE = False
     print(f"❌ Hume models import failed: {e}")
 
 # Test API key
-import os
-from dotenv import load_dotenv
 load_dotenv()
 api_key = os.getenv("HUME_API_KEY")
 print(f"API Key loaded: {bool(api_key)}")
 
-if api_key:
+if HUME_AVAILABLE and api_key:
     try:
         client = HumeBatchClient(api_key)
         print("✅ Hume client initialization successful")
 
-        # Test job creation and check available methods
+        # Check the job methods the agents may rely on; only submit a real (billed) job with --live
         print("\n🔍 Testing Hume AI job methods...")
-        from hume.models.config import BurstConfig, FacemeshConfig
-
-        # Create a dummy data URL (small JPEG-like data)
-        test_url = "data:image/jpeg;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
-
-        configs = [BurstConfig(), FacemeshConfig()]
-        job = client.submit_job([test_url], configs)
-        print(f"Job created: {type(job)}")
-        print(f"Available methods: {[m for m in dir(job) if not m.startswith('_')]}")
-
-        # Check if get_job_result exists
-        if hasattr(job, 'get_job_result'):
-            print("✅ get_job_result method exists")
-        else:
-            print("❌ get_job_result method missing")
-
-        # Look for alternative methods
-        if hasattr(job, 'await_complete'):
-            print("✅ await_complete method found")
-        elif hasattr(job, 'wait_for_completion'):
-            print("✅ wait_for_completion method found")
-        elif hasattr(job, 'get_predictions'):
-            print("✅ get_predictions method found")
+        job = BatchJob
+        if "--live" in sys.argv[1:] and HUME_MODELS_AVAILABLE:
+            configs = [BurstConfig(), FacemeshConfig()]
+            job = client.submit_job([_TEST_PIXEL_URL], configs)
+            print(f"Job created: {type(job)}")
+
+        for name in _JOB_METHODS:
+            print(f"{'✅' if hasattr(job, name) else '❌'} {name}")
 
     except Exception as e:
         print(f"❌ Hume client initialization failed: {e}")
-        import traceback
         traceback.print_exc()
@@ -5,26 +5,71 @@ Run this to test different inputs with agents!
 """
 
 import json
+import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
 
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+# Prefer simdjson when installed: its documents are read lazily, so format_response only
+# converts the fields it actually shows
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+def _decode(content: bytes) -> Dict[str, Any]:
+    """Decode a JSON response body into a dict, or a lazy read-only mapping with simdjson."""
+    if simdjson is None:
+        return _json_loads(content)
+    # A parser can't be reused while one of its documents is alive, and the document
+    # outlives this call, so each response gets its own parser
+    return simdjson.Parser().parse(content)
+
+# Prompts sent by demo_tests
+_DEMO_INPUTS = (
+    "Help me prepare for Python interview",
+    "I need resources for learning machine learning",
+    "Create a study plan for data structures",
+    "What resources do you recommend for web development?"
+)
+
+# Words that end the interactive session
+_EXIT_WORDS = frozenset({'quit', 'exit', 'q'})
+
+# One pooled keep-alive session, so repeated requests reuse the connection to the server
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+@lru_cache(maxsize=64)
+def _encoded_payload(user_input: str, student_id: str) -> bytes:
+    """Request body for a prompt, encoded once per unique prompt."""
+    return _json_dumps({"user_input": user_input, "student_id": student_id})
+
 def test_agent_with_input(user_input: str, student_id: str = "test_student") -> Dict[str, Any]:
     """Test the agent system with custom input."""
     try:
         url = "http://127.0.0.1:8000/study-plan"
-        payload = {
-            "user_input": user_input,
-            "student_id": student_id
-        }
 
         print("🤖 Sending request to agent system...")
         print(f"Input: {user_input}")
         print("-" * 50)
 
-        response = requests.post(url, json=payload, timeout=30)
+        response = _SESSION.post(url, data=_encoded_payload(user_input, student_id),
+                                 headers=_JSON_HEADERS, timeout=30)
         response.raise_for_status()
 
-        data = response.json()
+        data = _decode(response.content)
         return data
 
     except requests.exceptions.ConnectionError:
@@ -40,75 +85,79 @@ def format_response(data: Dict[str, Any]) -> None:
     if not data:
         return
 
-    print("\n🤖 STUDENT AI ASSISTANT RESPONSE:")
-    print("=" * 60)
+    # Collect the whole report and write it to stdout once
+    parts = ["\n🤖 STUDENT AI ASSISTANT RESPONSE:", "=" * 60]
+    add = parts.append
 
     # Greeting
-    if 'greeting' in data:
-        print(f"🙋 {data['greeting']}")
-        print()
+    greeting = data.get('greeting')
+    if greeting:
+        add(f"🙋 {greeting}\n")
 
     # Study Plan
-    if 'study_plan' in data and data['study_plan']:
-        sp = data['study_plan']
-        print('📅 STUDY PLAN:')
-        print(f"   Subject: {sp.get('topic', 'Unknown')}")
-        print(f"   Duration: {sp.get('duration', 'Unknown')}")
-        print(f"   Difficulty: {sp.get('difficulty', 'Unknown')}")
-        sessions = sp.get('sessions', [])
+    sp = data.get('study_plan')
+    if sp:
+        sp_get = sp.get
+        topic, duration, difficulty = sp_get('topic', 'Unknown'), sp_get('duration', 'Unknown'), sp_get('difficulty', 'Unknown')
+        sessions = sp_get('sessions', ())
+        add('📅 STUDY PLAN:')
+        add(f"   Subject: {topic}")
+        add(f"   Duration: {duration}")
+        add(f"   Difficulty: {difficulty}")
         if sessions:
-            print("   Sessions:")
+            add("   Sessions:")
             for session in sessions[:3]:  # Show first 3
-                print(f"     - {session.get('day', 'Day')}: {session.get('topic', 'Topic')} ({session.get('duration', '1h')})")
-        print()
+                session_get = session.get
+                add(f"     - {session_get('day', 'Day')}: {session_get('topic', 'Topic')} ({session_get('duration', '1h')})")
+        add("")
 
     # Learning Resources
-    if 'learning_resources' in data and data['learning_resources']:
-        lr = data['learning_resources']
-        resources = lr.get('resources', [])
+    lr = data.get('learning_resources')
+    if lr:
+        resources = lr.get('resources', ())
         if resources:
-            print('📚 RECOMMENDED LEARNING RESOURCES:')
+            add('📚 RECOMMENDED LEARNING RESOURCES:')
             for i, res in enumerate(resources[:3], 1):  # Show top 3
-                platform = res.get('platform', 'Unknown')
-                title = res.get('title', 'Untitled Resource')
-                print(f'   {i}. [{platform}] {title}')
-            print(f"   ⏱️  Estimated Time: {lr.get('estimated_time', '2 hours')}")
-            print()
+                res_get = res.get
+                add(f"   {i}. [{res_get('platform', 'Unknown')}] {res_get('title', 'Untitled Resource')}")
+            add(f"   ⏱️  Estimated Time: {lr.get('estimated_time', '2 hours')}\n")
 
     # Assessment
-    if 'assessment' in data and data['assessment']:
-        assmt = data['assessment']
-        if assmt.get('available_quiz'):
-            print('🧠 ASSESSMENT:')
-            print(f"   Quiz Available: Yes")
-            print(f"   Questions: {assmt.get('question_count', 0)}")
-            print(f"   Estimated Time: {assmt.get('estimated_time', '3 minutes')}")
-            print()
+    assmt = data.get('assessment')
+    if assmt:
+        assmt_get = assmt.get
+        if assmt_get('available_quiz'):
+            add('🧠 ASSESSMENT:')
+            add("   Quiz Available: Yes")
+            add(f"   Questions: {assmt_get('question_count', 0)}")
+            add(f"   Estimated Time: {assmt_get('estimated_time', '3 minutes')}\n")
 
     # Motivational Support
-    if 'motivational_support' in data and data['motivational_support']:
-        mot = data['motivational_support']
+    mot = data.get('motivational_support')
+    if mot:
         primary_msg = mot.get('primary_message', 'You got this!')
-        print('💪 MOTIVATIONAL SUPPORT:')
-        print(f'   "{primary_msg}"')
+        add('💪 MOTIVATIONAL SUPPORT:')
+        add(f'   "{primary_msg}"')
         next_goal = mot.get('next_goal', {}).get('goal', 'Complete your first study session')
-        print(f'   🎯 Next Goal: {next_goal}')
-        print()
+        add(f'   🎯 Next Goal: {next_goal}\n')
 
     # Wellness Insights
-    if 'wellness_insights' in data and data['wellness_insights']:
-        wellness = data['wellness_insights']
-        print('🌱 WELLNESS INSIGHTS:')
-        print(f"   Fatigue Level: {wellness.get('fatigue_level', 0.3):.1f}")
-        print(f"   Emotional State: {wellness.get('emotional_state', 'focused')}")
-        recommendations = wellness.get('recommendations', [])[:2]
+    wellness = data.get('wellness_insights')
+    if wellness:
+        wellness_get = wellness.get
+        add('🌱 WELLNESS INSIGHTS:')
+        add(f"   Fatigue Level: {wellness_get('fatigue_level', 0.3):.1f}")
+        add(f"   Emotional State: {wellness_get('emotional_state', 'focused')}")
+        recommendations = wellness_get('recommendations', ())[:2]
         if recommendations:
-            print("   💡 Recommendations:")
-            for rec in recommendations:
-                print(f"      - {rec}")
-        print()
+            add("   💡 Recommendations:")
+            parts.extend(f"      - {rec}" for rec in recommendations)
+        add("")
 
-    print("-" * 60)
+    add("-" * 60)
+    add("")
+    sys.stdout.write("\n".join(parts))
+    sys.stdout.flush()
 
 def interactive_test():
     """Run interactive testing."""
@@ -122,7 +171,7 @@ def interactive_test():
         try:
             user_input = input("👤 Your request: ").strip()
 
-            if user_input.lower() in ['quit', 'exit', 'q']:
+            if user_input.lower() in _EXIT_WORDS:
                 print("\n👋 Goodbye! Your AI agents are working perfectly!")
                 break
 
@@ -143,30 +192,22 @@ def interactive_test():
 
 def demo_tests():
     """Run some demo tests."""
-    test_inputs = [
-        "Help me prepare for Python interview",
-        "I need resources for learning machine learning",
-        "Create a study plan for data structures",
-        "What resources do you recommend for web development?"
-    ]
+    test_inputs = _DEMO_INPUTS
 
     print("🎯 AGENT DEMO TESTS")
     print("=" * 60)
 
-    for i, test_input in enumerate(test_inputs, 1):
-        print(f"\nTest {i}: {test_input}")
-        print("-" * 40)
+    # Send all requests at once; results are still shown in input order
+    with ThreadPoolExecutor(max_workers=len(test_inputs)) as executor:
+        results = executor.map(test_agent_with_input, test_inputs)
 
-        response_data = test_agent_with_input(test_input)
-        format_response(response_data)
+        for i, (test_input, response_data) in enumerate(zip(test_inputs, results), 1):
+            print(f"\nTest {i}: {test_input}")
+            print("-" * 40)
 
-        # Small delay between tests
-        import time
-        time.sleep(1)
+            format_response(response_data)
 
 if __name__ == "__main__":
-    import sys
-
     if len(sys.argv) > 1 and sys.argv[1] == "demo":
         # Run demo tests
         demo_tests()
@@ -5,11 +5,12 @@ Test Integration - Verify Hume AI connection and stress analysis
 
 import sys
 import os
-sys.path.insert(0, os.getcwd())
+import numpy as np
 
-# Test imports
+# Test imports; the script's own directory is already on sys.path
 try:
-    from agent_utils import analyze_image_for_stress, get_stress_category, test_hume_connection, analyze_emotion_sync
+    from agent_utils import (analyze_image_for_stress, get_stress_categories, test_hume_connection,
+                             analyze_emotion_sync, hume_client, hume_api_key)
     print("✅ Successfully imported agent_utils")
 except Exception as e:
     print(f"❌ Failed to import agent_utils: {e}")
@@ -27,23 +28,19 @@ except Exception as e:
 print("\n🎥 Testing Hume AI connection...")
 
 # Debug Hume initialization
-try:
-    from agent_utils import hume_client, hume_api_key
-    print(f"API Key loaded: {bool(hume_api_key)}")
-    print(f"Hume client initialized: {bool(hume_client)}")
-except Exception as e:
-    print(f"Error importing Hume variables: {e}")
+print(f"API Key loaded: {bool(hume_api_key)}")
+print(f"Hume client initialized: {bool(hume_client)}")
 
 hume_connected = test_hume_connection()
 
 # Test stress categorization
 print("\n📊 Testing stress categorization...")
 test_stress_levels = [10, 25, 50, 75, 90]
-for level in test_stress_levels:
-    category = get_stress_category(level)
+categories = get_stress_categories(np.array(test_stress_levels))
+for level, category in zip(test_stress_levels, categories):
     print(f"Stress {level}%: {category}")
 
-print("\n🎯 Hume AI key from .env:", "Vho7axMnkvleW..." if "HUME_API_KEY" in str(os.environ) else "❌ Not found")
+print("\n🎯 Hume AI key from .env:", "Vho7axMnkvleW..." if "HUME_API_KEY" in os.environ else "❌ Not found")
 
 # Dummy test image analysis (without actual camera)
 print("\n🧪 Testing stress analysis with dummy data...")